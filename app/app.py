@@ -1,6 +1,13 @@
 # import os
-from flask import Flask
+from flask import Flask, got_request_exception
 from app.controllers.report_controller import report_blueprint
+from app.controllers.metrics_controller import metrics_blueprint
+from app.commands.index_commands import index_commands
+from app.commands.precompute_commands import precompute_commands
+from app.commands.batch_commands import batch_commands
+from app.services.classification_pool import warm_up, warm_up_on_start
+from app.services.pdf_job_service import init_pdf_jobs
+from app.services.metrics import count_unhandled_exception
 
 # from app.services.errors import (
 #     InexistantChat,
@@ -14,6 +21,15 @@ from app.controllers.report_controller import report_blueprint
 def create_app():
     app = Flask(__name__)
     app.register_blueprint(report_blueprint)
+    app.register_blueprint(metrics_blueprint)
+    app.cli.add_command(index_commands)
+    app.cli.add_command(precompute_commands)
+    app.cli.add_command(batch_commands)
+    got_request_exception.connect(count_unhandled_exception, app)
+    init_pdf_jobs()
+
+    if warm_up_on_start:
+        warm_up()
 
     return app
 
@@ -0,0 +1,23 @@
+from quart import Quart, got_request_exception
+from app.controllers.async_report_controller import async_report_blueprint
+from app.controllers.async_metrics_controller import async_metrics_blueprint
+from app.services.classification_pool import warm_up, warm_up_on_start
+from app.services.pdf_job_service import init_pdf_jobs
+from app.services.metrics import count_unhandled_exception
+
+
+def create_asgi_app():
+    # Serve with an ASGI server, e.g. `hypercorn app.asgi:app`
+    app = Quart(__name__)
+    app.register_blueprint(async_report_blueprint)
+    app.register_blueprint(async_metrics_blueprint)
+    got_request_exception.connect(count_unhandled_exception, app)
+    init_pdf_jobs()
+
+    if warm_up_on_start:
+        warm_up()
+
+    return app
+
+
+app = create_asgi_app()
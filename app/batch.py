@@ -0,0 +1,4 @@
+from app.commands.batch_commands import batch_commands
+
+if __name__ == "__main__":
+    batch_commands()
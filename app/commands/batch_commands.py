@@ -0,0 +1,78 @@
+import time
+
+import click
+
+from flask.cli import AppGroup
+from bson.objectid import ObjectId
+from app.services.batch_scoring_service import (
+    BatchScoringService,
+    MongoResultWriter,
+    ParquetResultWriter,
+    batch_chunk_size,
+    batch_flush_size,
+    batch_workers,
+)
+
+batch_commands = AppGroup("batch", help="Score the sentiment of whole accounts offline.")
+
+
+def progress_reporter(interval: float = 2.0):
+    last_report = 0.0
+
+    def report(done: int, total: int, elapsed: float):
+        nonlocal last_report
+        if elapsed - last_report < interval and done < total:
+            return
+        last_report = elapsed
+        percent = 100 * done / total if total > 0 else 100.0
+        click.echo(f"{done}/{total} chats ({percent:.1f}%) in {elapsed:.0f}s", err=True)
+
+    return report
+
+
+# Does not need the Flask app, so it also runs as `python -m app.batch score`
+@batch_commands.command("score", with_appcontext=False)
+@click.option("--account", "account_id", required=True, help="Account whose chats are scored.")
+@click.option("--run-id", help="Checkpoint name, defaults to <account>:<year>-<month>.")
+@click.option(
+    "--parquet",
+    "parquet_dir",
+    type=click.Path(file_okay=False),
+    help="Write Parquet files to this directory instead of chat_sentiment_results (needs pyarrow).",
+)
+@click.option("--workers", type=click.IntRange(min=1), default=batch_workers, show_default=True)
+@click.option("--chunk-size", type=click.IntRange(min=1), default=batch_chunk_size, show_default=True)
+@click.option("--flush-size", type=click.IntRange(min=1), default=batch_flush_size, show_default=True)
+@click.option("--restart", is_flag=True, help="Ignore the run's checkpoint and score every chat.")
+def score(account_id, run_id, parquet_dir, workers, chunk_size, flush_size, restart):
+    """Score every chat of an account, resuming an interrupted run."""
+    if not ObjectId.is_valid(account_id):
+        raise click.BadParameter(f"'{account_id}' is not a valid ObjectId", param_hint="--account")
+    account_id = str(ObjectId(account_id))
+    run_id = run_id or f"{account_id}:{time.strftime('%Y-%m')}"
+
+    if parquet_dir is not None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise click.UsageError("--parquet needs pyarrow installed")
+        writer = ParquetResultWriter(parquet_dir)
+    else:
+        writer = MongoResultWriter(run_id, account_id)
+
+    batch_scoring_service = BatchScoringService(
+        account_id, run_id, writer, workers=workers, chunk_size=chunk_size, flush_size=flush_size
+    )
+    try:
+        summary = batch_scoring_service.score_account(restart, progress=progress_reporter())
+    except ValueError as err:
+        raise click.ClickException(str(err))
+
+    click.echo(
+        f"Scored {summary['chats']} chats in {summary['elapsed']:.1f}s "
+        f"({summary['chats_per_second']:.1f} chats/s)"
+    )
+    click.echo(
+        f"Run {run_id}: {summary['scored']} scored, {summary['failed']} without enough "
+        f"messages, {summary['resumed']} from an earlier attempt -> {writer.output}"
+    )
@@ -0,0 +1,89 @@
+import click
+
+from datetime import datetime, timezone
+from flask.cli import AppGroup
+from bson.objectid import ObjectId
+from app.database.indexes import create_indexes, missing_indexes
+from app.repositories.report_repository import MESSAGE_ORDER, ReportRepository
+
+index_commands = AppGroup("indexes", help="Manage the MongoDB indexes used by reports.")
+
+
+def plan_stages(plan: dict):
+    # Flatten the stages of an explain() winning plan
+    stages = [plan["stage"]]
+    if "inputStage" in plan:
+        stages += plan_stages(plan["inputStage"])
+    for input_stage in plan.get("inputStages", []):
+        stages += plan_stages(input_stage)
+    return stages
+
+
+def is_index_backed(stages: list):
+    # Queries must scan an index and never sort in memory
+    return "IXSCAN" in stages and "COLLSCAN" not in stages and "SORT" not in stages
+
+
+def explain_report_queries(report_repository: ReportRepository):
+    # Any ids work, the planner only needs the shape of the queries
+    chat_query = report_repository.chat_query(str(ObjectId()), "explain")
+    messages_cursor = report_repository.get_chat_messages(str(ObjectId()))
+
+    plans = {
+        "chats.get_chat_id": report_repository.chat_collection.find(chat_query, {"_id": 1})
+        .limit(1)
+        .explain(),
+        "messages.get_chat_messages": messages_cursor.explain(),
+        "messages.get_chat_messages_after": report_repository.get_chat_messages(
+            str(ObjectId()), datetime.now(timezone.utc), ObjectId()
+        ).explain(),
+        "messages.get_last_message": report_repository.message_collection.find(
+            report_repository.version_query(str(ObjectId())), {"_id": 1, "send_date": 1}
+        )
+        .sort([("send_date", -1), ("_id", -1)])
+        .limit(1)
+        .explain(),
+        "messages.get_next_client_message": report_repository.message_collection.find(
+            report_repository.client_messages_query(
+                str(ObjectId()), datetime.now(timezone.utc), ObjectId()
+            ),
+            {"_id": 1, "send_date": 1},
+        )
+        .sort(MESSAGE_ORDER)
+        .limit(1)
+        .explain(),
+        "messages.get_recent_client_messages": report_repository.get_recent_client_messages(
+            str(ObjectId()), 100
+        ).explain(),
+    }
+    return {
+        name: plan_stages(plan["queryPlanner"]["winningPlan"])
+        for name, plan in plans.items()
+    }
+
+
+@index_commands.command("create")
+def create():
+    """Create the indexes needed by the report queries."""
+    for name in create_indexes():
+        click.echo(f"Index {name} is in place")
+
+
+@index_commands.command("verify")
+def verify():
+    """Check that the report queries are backed by indexes."""
+    failed = False
+
+    for name in missing_indexes():
+        click.echo(f"Missing index {name}")
+        failed = True
+
+    for query, stages in explain_report_queries(ReportRepository()).items():
+        if not is_index_backed(stages):
+            click.echo(f"{query} is not index-backed: {' -> '.join(stages)}")
+            failed = True
+        else:
+            click.echo(f"{query}: {' -> '.join(stages)}")
+
+    if failed:
+        raise SystemExit(1)
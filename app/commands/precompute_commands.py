@@ -0,0 +1,24 @@
+import signal
+
+import click
+
+from flask.cli import AppGroup
+from app.services.precompute_service import PrecomputeService
+
+precompute_commands = AppGroup(
+    "precompute", help="Keep chat sentiment precomputed in the background."
+)
+
+
+@precompute_commands.command("run")
+@click.option("--poll", is_flag=True, help="Poll for new messages instead of using a change stream.")
+def run(poll):
+    """Fold new client messages into the chat states as they arrive."""
+    precompute_service = PrecomputeService()
+
+    # The current batch is finished and checkpointed before exiting
+    signal.signal(signal.SIGTERM, lambda *args: precompute_service.stop())
+    try:
+        precompute_service.run(polling=poll)
+    except KeyboardInterrupt:
+        precompute_service.stop()
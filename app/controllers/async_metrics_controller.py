@@ -0,0 +1,11 @@
+from quart import Blueprint
+from app.services.metrics import METRICS_CONTENT_TYPE, render_metrics
+
+# Same route as metrics_blueprint, for the ASGI app
+async_metrics_blueprint = Blueprint("async_metrics", __name__)
+
+
+@async_metrics_blueprint.route("/metrics", methods=["GET"])
+async def return_metrics():
+    # Prometheus text exposition of the report pipeline metrics of this worker
+    return render_metrics(), 200, {"Content-Type": METRICS_CONTENT_TYPE}
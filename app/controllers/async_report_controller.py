@@ -0,0 +1,227 @@
+from quart import Blueprint, g, jsonify, request
+from app.services.async_report_service import AsyncReportService, run_in_cpu_executor
+from app.services.async_sentiment_report_service import AsyncSentimentReportService
+from app.services.report_service import ReportService
+from app.services.snapshot_service import SnapshotService
+from app.services.pdf_job_service import PdfJobService
+from app.services.metrics import count_exception
+from app.services.profiling import PROFILE_HEADER, start_request_profile
+from app.exceptions.errors import (
+    InexistantChat,
+    VoidChatHistory,
+    NoClientMessages,
+    NoSentimentSnapshots,
+)
+from bson.errors import InvalidId
+from dateutil import parser
+
+# Same routes as report_blueprint, served from an event loop by the ASGI app
+async_report_blueprint = Blueprint("async_chat_sentiment", __name__, url_prefix="/report")
+
+
+@async_report_blueprint.before_request
+async def start_profiling():
+    # Same opt-in profile as report_blueprint, of the event loop thread while the request
+    # runs: it also sees the requests interleaved with it, not the executor stages
+    g.request_profile = start_request_profile(
+        request.headers.get(PROFILE_HEADER), request.args.get("wa_chat_id")
+    )
+
+
+@async_report_blueprint.teardown_request
+async def stop_profiling(error=None):
+    request_profile = g.pop("request_profile", None)
+    if request_profile is not None:
+        request_profile.stop()
+
+
+@async_report_blueprint.route("/health", methods=["GET"])
+async def return_health():
+    return 'OK', 200
+
+
+@async_report_blueprint.route("/", methods=["GET"])
+async def getSentimentReport():
+    sentiment_report_service = AsyncSentimentReportService()
+
+    # Retrieve account_id and wa_chat_id from query string:
+    account_id = request.args.get("account_id")
+    wa_chat_id = request.args.get("wa_chat_id")
+
+    # Check if account_id and wa_chat_id are present:
+    if account_id == None or wa_chat_id == None:
+        return (
+            jsonify(
+                {
+                    "error": "Account ID (account_id) and Whatsapp Chat ID(wa_chat_id) are required"
+                }
+            ),
+            400,
+        )
+
+    # Optional tolerance for the approximate coefficient of the most recent messages:
+    tolerance = request.args.get("tolerance")
+    if tolerance != None:
+        try:
+            tolerance = float(tolerance)
+        except ValueError:
+            tolerance = None
+        if tolerance == None or not tolerance > 0:
+            return jsonify({"error": "Tolerance (tolerance) must be a positive number"}), 400
+
+    # Generate chat sentiment, see SentimentReportService for the cache and version checks:
+    try:
+        if tolerance != None:
+            result = await sentiment_report_service.get_recent_report(
+                account_id, wa_chat_id, tolerance
+            )
+            return jsonify(result), 200
+
+        report = await sentiment_report_service.get_report(account_id, wa_chat_id)
+    except InvalidId as err:
+        count_exception(err)
+        return str(err), 400
+    except (InexistantChat, VoidChatHistory, NoClientMessages) as err:
+        count_exception(err)
+        return str(err), 404
+
+    # Clients that already hold this version get an empty response:
+    headers = {"ETag": f'"{report["version"]}"'}
+    if request.if_none_match.contains(report["version"]):
+        return "", 304, headers
+
+    # Return:
+    return (
+        f'The satisfaction label for the calculated coefficient is "{report["label"]}"!',
+        200,
+        headers,
+    )
+
+
+@async_report_blueprint.route("/batch", methods=["POST"])
+async def getBatchSentimentReport():
+    # Retrieve the list of {account_id, wa_chat_id} pairs from the request body:
+    body = await request.get_json(silent=True) or {}
+    chats = body.get("chats")
+
+    # Check if every chat has account_id and wa_chat_id:
+    if not isinstance(chats, list) or any(
+        not isinstance(c, dict) or c.get("account_id") == None or c.get("wa_chat_id") == None
+        for c in chats
+    ):
+        return (
+            jsonify(
+                {
+                    "error": "A list of chats (chats) with Account ID (account_id) and Whatsapp Chat ID(wa_chat_id) is required"
+                }
+            ),
+            400,
+        )
+
+    chat_keys = [(str(c["account_id"]), c["wa_chat_id"]) for c in chats]
+
+    def score_batch():
+        # A batch is already fetched with two queries, it runs whole in the executor
+        results = ReportService().get_batch_sentiment(chat_keys)
+
+        # Add every calculated chat sentiment to the accounts' daily snapshots:
+        snapshot_service = SnapshotService()
+        for result in results:
+            if "coefficient" in result:
+                snapshot_service.record_chat_sentiment(
+                    result["account_id"], result["chat_id"], result["coefficient"]
+                )
+        return results
+
+    results = await run_in_cpu_executor(score_batch)
+
+    return jsonify({"results": results}), 200
+
+
+@async_report_blueprint.route("/pdf", methods=["POST"])
+async def createPdfReport():
+    report_service = AsyncReportService()
+
+    # Retrieve account_id and wa_chat_id from query string:
+    account_id = request.args.get("account_id")
+    wa_chat_id = request.args.get("wa_chat_id")
+
+    # Check if account_id and wa_chat_id are present:
+    if account_id == None or wa_chat_id == None:
+        return (
+            jsonify(
+                {
+                    "error": "Account ID (account_id) and Whatsapp Chat ID(wa_chat_id) are required"
+                }
+            ),
+            400,
+        )
+
+    # Retrieve chat_id:
+    try:
+        chat_id = await report_service.get_chat_id(account_id, wa_chat_id)
+    except InexistantChat as err:
+        return str(err), 404
+    except InvalidId as err:
+        return str(err), 400
+
+    # The report is rendered and uploaded to S3 in the background:
+    job_id = await run_in_cpu_executor(PdfJobService().submit_job, chat_id)
+
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+
+@async_report_blueprint.route("/pdf/<job_id>", methods=["GET"])
+async def getPdfReportJob(job_id):
+    job = await run_in_cpu_executor(PdfJobService().get_job, job_id)
+
+    if job == None:
+        return jsonify({"error": "Job não encontrado"}), 404
+
+    return (
+        jsonify(
+            {
+                "job_id": job["id"],
+                "status": job["status"],
+                "s3_key": job["s3_key"],
+                "error": job["error"],
+            }
+        ),
+        200,
+    )
+
+
+@async_report_blueprint.route("/joint_sentiment", methods=["GET"])
+async def join_sentiment_coefficients():
+    snapshot_service = SnapshotService()
+
+    # Retrieve account and date limits using query strings:
+    account_id = request.args.get("account_id")
+    from_date = request.args.get("from_date")
+    to_date = request.args.get("to_date")
+
+    # Check if account_id, from_date and to_date are present:
+    if account_id == None or from_date == None or to_date == None:
+        return (
+            jsonify(
+                {
+                    "error": "Account ID (account_id) and limiting dates are necessary to generate a sentiment coefficient"
+                }
+            ),
+            400,
+        )
+
+    # Average chat sentiment of the account's daily snapshots in the period:
+    try:
+        coef = await run_in_cpu_executor(
+            snapshot_service.get_joint_sentiment,
+            account_id,
+            parser.parse(from_date),
+            parser.parse(to_date),
+        )
+    except NoSentimentSnapshots as err:
+        return str(err), 404
+    except (InvalidId, parser.ParserError, OverflowError) as err:
+        return str(err), 400
+
+    return str(coef), 200
@@ -0,0 +1,10 @@
+from flask import Blueprint
+from app.services.metrics import METRICS_CONTENT_TYPE, render_metrics
+
+metrics_blueprint = Blueprint("metrics", __name__)
+
+
+@metrics_blueprint.route("/metrics", methods=["GET"])
+def return_metrics():
+    # Prometheus text exposition of the report pipeline metrics of this worker
+    return render_metrics(), 200, {"Content-Type": METRICS_CONTENT_TYPE}
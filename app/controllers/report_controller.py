@@ -1,20 +1,37 @@
-import random
-
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, g, jsonify, request
 from app.services.report_service import ReportService
+from app.services.sentiment_report_service import SentimentReportService
+from app.services.snapshot_service import SnapshotService
+from app.services.pdf_job_service import PdfJobService
+from app.services.metrics import count_exception
+from app.services.profiling import PROFILE_HEADER, start_request_profile
 from app.exceptions.errors import (
     InexistantChat,
     VoidChatHistory,
     NoClientMessages,
-    S3UploadError,
+    NoSentimentSnapshots,
 )
 from bson.errors import InvalidId
-from datetime import datetime as dt, timedelta
 from dateutil import parser
 
 report_blueprint = Blueprint("chat_sentiment", __name__, url_prefix="/report")
 
 
+@report_blueprint.before_request
+def start_profiling():
+    # Opt-in cProfile of the request, see [PROFILING] in config.ini
+    g.request_profile = start_request_profile(
+        request.headers.get(PROFILE_HEADER), request.args.get("wa_chat_id")
+    )
+
+
+@report_blueprint.teardown_request
+def stop_profiling(error=None):
+    request_profile = g.pop("request_profile", None)
+    if request_profile is not None:
+        request_profile.stop()
+
+
 @report_blueprint.route("/health", methods=["GET"])
 def return_health():
     return 'OK', 200
@@ -22,7 +39,7 @@ def return_health():
 
 @report_blueprint.route("/", methods=["GET"])
 def getSentimentReport():
-    report_service = ReportService()
+    sentiment_report_service = SentimentReportService()
 
     # Retrieve account_id and wa_chat_id from query string:
     account_id = request.args.get("account_id")
@@ -39,87 +56,160 @@ def getSentimentReport():
             400,
         )
 
-    # Retrieve chat_id:
+    # Optional tolerance for the approximate coefficient of the most recent messages:
+    tolerance = request.args.get("tolerance")
+    if tolerance != None:
+        try:
+            tolerance = float(tolerance)
+        except ValueError:
+            tolerance = None
+        if tolerance == None or not tolerance > 0:
+            return jsonify({"error": "Tolerance (tolerance) must be a positive number"}), 400
+
+    # Generate chat sentiment, see SentimentReportService for the cache and version checks:
     try:
-        chat_id = report_service.get_chat_id(account_id, wa_chat_id)
-    except InexistantChat as err:
-        return str(err), 404
+        if tolerance != None:
+            result = sentiment_report_service.get_recent_report(account_id, wa_chat_id, tolerance)
+            return jsonify(result), 200
+
+        report = sentiment_report_service.get_report(account_id, wa_chat_id)
     except InvalidId as err:
+        count_exception(err)
         return str(err), 400
+    except (InexistantChat, VoidChatHistory, NoClientMessages) as err:
+        count_exception(err)
+        return str(err), 404
 
-    # Retrieve messages:
-    messages = report_service.get_chat_messages(chat_id)
+    # Clients that already hold this version get an empty response:
+    headers = {"ETag": f'"{report["version"]}"'}
+    if request.if_none_match.contains(report["version"]):
+        return "", 304, headers
 
-    # Create messages dataframe:
-    messages_df = report_service.import_data(messages)
+    # Return:
+    return (
+        f'The satisfaction label for the calculated coefficient is "{report["label"]}"!',
+        200,
+        headers,
+    )
 
-    # Data Processing:
 
-    # Remove non-client data:
-    client_messages_df = report_service.message_cleanup(messages_df)
+@report_blueprint.route("/batch", methods=["POST"])
+def getBatchSentimentReport():
+    report_service = ReportService()
 
-    # Model Application:
+    # Retrieve the list of {account_id, wa_chat_id} pairs from the request body:
+    body = request.get_json(silent=True) or {}
+    chats = body.get("chats")
 
-    # Apply LeIA model:
-    classified_messages_df = report_service.chat_classification(client_messages_df)
+    # Check if every chat has account_id and wa_chat_id:
+    if not isinstance(chats, list) or any(
+        not isinstance(c, dict) or c.get("account_id") == None or c.get("wa_chat_id") == None
+        for c in chats
+    ):
+        return (
+            jsonify(
+                {
+                    "error": "A list of chats (chats) with Account ID (account_id) and Whatsapp Chat ID(wa_chat_id) is required"
+                }
+            ),
+            400,
+        )
+
+    chat_keys = [(str(c["account_id"]), c["wa_chat_id"]) for c in chats]
+    results = report_service.get_batch_sentiment(chat_keys)
 
-    # Calculate messages' weights:
+    # Add every calculated chat sentiment to the accounts' daily snapshots:
+    snapshot_service = SnapshotService()
+    for result in results:
+        if "coefficient" in result:
+            snapshot_service.record_chat_sentiment(
+                result["account_id"], result["chat_id"], result["coefficient"]
+            )
+
+    return jsonify({"results": results}), 200
+
+
+@report_blueprint.route("/pdf", methods=["POST"])
+def createPdfReport():
+    report_service = ReportService()
+
+    # Retrieve account_id and wa_chat_id from query string:
+    account_id = request.args.get("account_id")
+    wa_chat_id = request.args.get("wa_chat_id")
+
+    # Check if account_id and wa_chat_id are present:
+    if account_id == None or wa_chat_id == None:
+        return (
+            jsonify(
+                {
+                    "error": "Account ID (account_id) and Whatsapp Chat ID(wa_chat_id) are required"
+                }
+            ),
+            400,
+        )
+
+    # Retrieve chat_id:
     try:
-        weighted_df = report_service.generate_weighted_df(classified_messages_df)
-    except NoClientMessages as err:
+        chat_id = report_service.get_chat_id(account_id, wa_chat_id)
+    except InexistantChat as err:
         return str(err), 404
+    except InvalidId as err:
+        return str(err), 400
 
-    # Generate whole chat sentiment:
-    coefficient = report_service.calculate_chat_sentiment_coef(weighted_df)
+    # The report is rendered and uploaded to S3 in the background:
+    job_id = PdfJobService().submit_job(chat_id)
 
-    sat_label = report_service.generate_sentiment_label(coefficient)
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
 
-    # # Format Chat Messages:
-    # formated_chat = report_service.format_chat(messages)
-    # Create pdf byte file:
-    # pdf_buffer = report_service.create_report(formated_chat, coefficient)
 
-    # # S3 upload:
-    # s3_path = f"report/sentiment_analysis_report.pdf"
-    # try:
-    #     report_service.update_file_to_s3(pdf_buffer, s3_path)
-    # except S3UploadError as err:
-    #     return str(err), 500
+@report_blueprint.route("/pdf/<job_id>", methods=["GET"])
+def getPdfReportJob(job_id):
+    job = PdfJobService().get_job(job_id)
 
-    # Return:
-    return f'The satisfaction label for the calculated coefficient is "{sat_label}"!', 200
+    if job == None:
+        return jsonify({"error": "Job não encontrado"}), 404
+
+    return (
+        jsonify(
+            {
+                "job_id": job["id"],
+                "status": job["status"],
+                "s3_key": job["s3_key"],
+                "error": job["error"],
+            }
+        ),
+        200,
+    )
 
 
 @report_blueprint.route("/joint_sentiment", methods=["GET"])
 def join_sentiment_coefficients():
+    snapshot_service = SnapshotService()
 
-    # Retrieve date limits using query strings:
+    # Retrieve account and date limits using query strings:
+    account_id = request.args.get("account_id")
     from_date = request.args.get("from_date")
     to_date = request.args.get("to_date")
-    print(from_date)
 
-    # Check if account_id and wa_chat_id are present:
-    if from_date == None or to_date == None:
+    # Check if account_id, from_date and to_date are present:
+    if account_id == None or from_date == None or to_date == None:
         return (
             jsonify(
                 {
-                    "error": "Limiting dates are necessary to generate a sentiment coefficient"
+                    "error": "Account ID (account_id) and limiting dates are necessary to generate a sentiment coefficient"
                 }
             ),
             400,
         )
 
-    current_day = parser.parse(from_date)
-    last_day = parser.parse(to_date)
-
-    count = 0
-    coef = 0
-    while current_day <= last_day:
-        # TODO: Remover geração automática de coeficientes e adicionar busca por SentimentSnapshots
-        coef += random.randint(-2, 2)
-        count += 1
-        current_day = current_day + timedelta(days=1)
-
-    coef = coef / count
+    # Average chat sentiment of the account's daily snapshots in the period:
+    try:
+        coef = snapshot_service.get_joint_sentiment(
+            account_id, parser.parse(from_date), parser.parse(to_date)
+        )
+    except NoSentimentSnapshots as err:
+        return str(err), 404
+    except (InvalidId, parser.ParserError, OverflowError) as err:
+        return str(err), 400
 
     return str(coef), 200
@@ -0,0 +1,27 @@
+import asyncio
+import os
+import threading
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.database.connection import config, client_options
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+def get_async_db(client=None):
+    # Motor clients are bound to the event loop they first run on, so each worker
+    # process and event loop gets its own client and connection pool
+    global _client, _client_key
+    if client is not None:
+        return client[config["MONGODB"]["DB_NAME"]]
+
+    key = (os.getpid(), asyncio.get_running_loop())
+    with _client_lock:
+        if _client is None or _client_key != key:
+            _client = AsyncIOMotorClient(
+                config["MONGODB"]["CONNECTION_STRING"], **client_options()
+            )
+            _client_key = key
+    return _client[config["MONGODB"]["DB_NAME"]]
@@ -1,12 +1,49 @@
 from pymongo import MongoClient
 import configparser
+import os
+import threading
 
 config = configparser.ConfigParser()
 config.read("config.ini")
 
-# Insert connection string and db name:
-client = MongoClient(config["MONGODB"]["CONNECTION_STRING"])
-db = client[config["MONGODB"]["DB_NAME"]]
+# Pool and timeout settings, unset options keep pymongo's defaults
+CLIENT_OPTIONS = [
+    ("MAX_POOL_SIZE", "maxPoolSize", int),
+    ("MIN_POOL_SIZE", "minPoolSize", int),
+    ("MAX_IDLE_TIME_MS", "maxIdleTimeMS", int),
+    ("WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS", int),
+    ("CONNECT_TIMEOUT_MS", "connectTimeoutMS", int),
+    ("SOCKET_TIMEOUT_MS", "socketTimeoutMS", int),
+    ("SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS", int),
+    ("READ_PREFERENCE", "readPreference", str),
+]
 
-chats_db = db["chats"]
-messages_db = db["messages"]
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def client_options():
+    options = {}
+    for key, option, cast in CLIENT_OPTIONS:
+        value = config.get("MONGODB", key, fallback="")
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+def get_client():
+    # Created on first use instead of at import, so every (forked) worker process opens
+    # its own pool after the fork
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = MongoClient(config["MONGODB"]["CONNECTION_STRING"], **client_options())
+            _client_pid = os.getpid()
+    return _client
+
+
+def get_db(client=None):
+    # A client can be passed in to use another connection, e.g. a mock in benchmarks
+    client = client or get_client()
+    return client[config["MONGODB"]["DB_NAME"]]
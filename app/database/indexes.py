@@ -0,0 +1,63 @@
+from app.database.connection import get_db
+from pymongo import ASCENDING, IndexModel
+
+# Indexes needed by the report and snapshot queries, by collection
+REQUIRED_INDEXES = [
+    (
+        "chats",
+        [
+            IndexModel(
+                [("account", ASCENDING), ("wa_chat_id", ASCENDING)],
+                name="account_wa_chat_id",
+            ),
+            # Bulk scoring walks an account's chats in _id order
+            IndexModel([("account", ASCENDING), ("_id", ASCENDING)], name="account_id"),
+        ],
+    ),
+    (
+        "messages",
+        [
+            IndexModel(
+                [
+                    ("chat", ASCENDING),
+                    ("type", ASCENDING),
+                    ("send_date", ASCENDING),
+                    ("_id", ASCENDING),
+                ],
+                name="chat_type_send_date_id",
+            ),
+        ],
+    ),
+    (
+        "sentiment_snapshots",
+        [
+            IndexModel(
+                [("account", ASCENDING), ("day", ASCENDING)],
+                name="account_day",
+                unique=True,
+            ),
+        ],
+    ),
+]
+
+
+def create_indexes(client=None):
+    db = get_db(client)
+    created = []
+    for collection_name, indexes in REQUIRED_INDEXES:
+        created += db[collection_name].create_indexes(indexes)
+    return created
+
+
+def missing_indexes(client=None):
+    db = get_db(client)
+    missing = []
+    for collection_name, indexes in REQUIRED_INDEXES:
+        existing_keys = [
+            list(index["key"].items()) for index in db[collection_name].list_indexes()
+        ]
+        for index in indexes:
+            keys = list(index.document["key"].items())
+            if keys not in existing_keys:
+                missing.append(f"{collection_name}.{index.document['name']}")
+    return missing
@@ -3,4 +3,4 @@ import configparser
 config = configparser.ConfigParser()
 config.read("config.ini")
 
-s3_bucket = config["AWS"]["S3_BUCKET_NAME"]
+s3_bucket = config.get("AWS", "S3_BUCKET_NAME", fallback=None)
@@ -10,3 +10,5 @@ class NoClientMessages(Exception):
 class S3UploadError(Exception):
     ...
 
+class NoSentimentSnapshots(Exception):
+    ...
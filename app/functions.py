@@ -8,11 +8,10 @@ from app.exceptions.errors import (
     NoClientMessages,
     S3UploadError,
 )
-from app.database.connection import messages_db, chats_db
+from app.database.connection import get_db
 from bson.objectid import ObjectId
+from app.services.analyzer_registry import AnalyzerRegistry
 from io import BytesIO
-from LeIA import SentimentIntensityAnalyzer as LeiaAnalyzer
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer as EmojiAnalyzer
 from app.database.s3_connection import s3_bucket
 
 from reportlab.lib.pagesizes import letter
@@ -27,7 +26,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle as PS
 
 
 def chat_id_verification(chat_id: str):
-    chat_check = chats_db.find_one({"_id": ObjectId(chat_id)})
+    chat_check = get_db()["chats"].find_one({"_id": ObjectId(chat_id)})
 
     if chat_check == None:
         raise InexistantChat(f"Erro: Arquivo do chat ${chat_id} não existe.")
@@ -41,7 +40,7 @@ def get_chat_messages(chat_id: str):
         "text": {"$exists": "true"},
     }
 
-    messages = messages_db.find(query).sort("send_date", 1)
+    messages = get_db()["messages"].find(query).sort("send_date", 1)
     messages = list(messages)
 
     if len(messages) < 3:
@@ -139,8 +138,8 @@ def split_message_sections(message: str):
 
 
 def get_message_compound(message: str) -> float:
-    leia = LeiaAnalyzer()
-    vader = EmojiAnalyzer()
+    leia = AnalyzerRegistry.leia()
+    vader = AnalyzerRegistry.emoji()
 
     split_message = split_message_sections(message)
 
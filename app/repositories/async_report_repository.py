@@ -0,0 +1,28 @@
+from app.database.async_connection import get_async_db
+from app.repositories.report_repository import ReportRepository
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+
+class AsyncReportRepository(ReportRepository):
+    # Same queries as ReportRepository over Motor collections: find_one, count and
+    # update calls return awaitables, find and aggregate return async cursors
+    def __init__(self, client=None):
+        db = get_async_db(client)
+        self.chat_collection = db["chats"]
+        self.message_collection = db["messages"]
+        self.chat_state_collection = db["chat_sentiment_states"]
+
+    async def save_chat_state(
+        self, chat_id: str, state: dict, previous_send_date=None, previous_message_id=None
+    ):
+        # The state is only replaced if nobody else folded messages since it was read
+        query = {
+            "_id": ObjectId(chat_id),
+            "last_send_date": previous_send_date,
+            "last_message_id": previous_message_id,
+        }
+        try:
+            await self.chat_state_collection.update_one(query, {"$set": state}, upsert=True)
+        except DuplicateKeyError:
+            pass
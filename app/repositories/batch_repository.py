@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+from app.database.connection import get_db
+from bson.objectid import ObjectId
+from pymongo import ReplaceOne
+
+
+class BatchRepository:
+    def __init__(self, client=None):
+        db = get_db(client)
+        self.chat_collection = db["chats"]
+        self.result_collection = db["chat_sentiment_results"]
+        self.run_collection = db["batch_runs"]
+
+    def account_chats_query(self, account_id: str, after=None):
+        query = {"account": ObjectId(account_id)}
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        return query
+
+    def count_account_chats(self, account_id: str, after=None):
+        return self.chat_collection.count_documents(self.account_chats_query(account_id, after))
+
+    def get_account_chat_ids(self, account_id: str, after=None, batch_size: int = 1000):
+        # Chats are walked in _id order so a run can resume after the last written chat
+        return (
+            self.chat_collection.find(self.account_chats_query(account_id, after), {"_id": 1})
+            .sort("_id", 1)
+            .batch_size(batch_size)
+        )
+
+    def save_results(self, run_id: str, account_id: str, results: list):
+        # Keyed by run and chat, so chats scored again after a crash are overwritten.
+        # Results are replaced whole, a chat that failed before keeps no error fields
+        account = ObjectId(account_id)
+        operations = [
+            ReplaceOne(
+                {"_id": {"run": run_id, "chat": result["chat_id"]}},
+                {**result, "account": account},
+                upsert=True,
+            )
+            for result in results
+        ]
+        if len(operations) > 0:
+            self.result_collection.bulk_write(operations, ordered=False)
+
+    def delete_results(self, run_id: str):
+        self.result_collection.delete_many({"_id.run": run_id})
+
+    def get_run(self, run_id: str):
+        return self.run_collection.find_one({"_id": run_id})
+
+    def start_run(self, run_id: str, account_id: str, output: str):
+        self.run_collection.replace_one(
+            {"_id": run_id},
+            {
+                "account": ObjectId(account_id),
+                "output": output,
+                "last_chat_id": None,
+                "scored": 0,
+                "failed": 0,
+                "finished": False,
+                "updated_at": datetime.now(timezone.utc),
+            },
+            upsert=True,
+        )
+
+    def save_run_checkpoint(
+        self, run_id: str, last_chat_id, scored: int, failed: int, finished: bool = False
+    ):
+        self.run_collection.update_one(
+            {"_id": run_id},
+            {
+                "$set": {
+                    "last_chat_id": last_chat_id,
+                    "scored": scored,
+                    "failed": failed,
+                    "finished": finished,
+                    "updated_at": datetime.now(timezone.utc),
+                }
+            },
+        )
@@ -0,0 +1,70 @@
+import configparser
+import os
+import sqlite3
+
+from contextlib import closing
+from datetime import datetime as dt
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+pdf_jobs_database = config.get("PDF_JOBS", "DATABASE", fallback="pdf_jobs.sqlite3")
+
+
+class PdfJobRepository:
+    def __init__(self, database: str = pdf_jobs_database):
+        self.database = database
+
+    def create_table(self):
+        self.execute(
+            "CREATE TABLE IF NOT EXISTS pdf_jobs ("
+            "id TEXT PRIMARY KEY, chat_id TEXT NOT NULL, status TEXT NOT NULL, "
+            "s3_key TEXT, error TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL, "
+            "pid INTEGER)"
+        )
+        # Stores created before jobs recorded the process that runs them
+        columns = [row["name"] for row in self.execute("PRAGMA table_info(pdf_jobs)")]
+        if "pid" not in columns:
+            self.execute("ALTER TABLE pdf_jobs ADD COLUMN pid INTEGER")
+
+    def execute(self, query: str, params: tuple = ()):
+        # A short-lived connection per call keeps the store safe to use from any thread
+        with closing(sqlite3.connect(self.database, timeout=30)) as connection:
+            connection.row_factory = sqlite3.Row
+            with connection:
+                return connection.execute(query, params).fetchall()
+
+    def create_job(self, job_id: str, chat_id: str):
+        now = dt.utcnow().isoformat()
+        self.execute(
+            "INSERT INTO pdf_jobs (id, chat_id, status, created_at, updated_at, pid) "
+            "VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, chat_id, now, now, os.getpid()),
+        )
+
+    def update_job(self, job_id: str, status: str, s3_key: str = None, error: str = None):
+        self.execute(
+            "UPDATE pdf_jobs SET status = ?, s3_key = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, s3_key, error, dt.utcnow().isoformat(), job_id),
+        )
+
+    def get_unfinished_jobs(self):
+        rows = self.execute(
+            "SELECT id, pid FROM pdf_jobs WHERE status IN ('queued', 'running')"
+        )
+        return [dict(row) for row in rows]
+
+    def fail_jobs(self, job_ids: list, error: str):
+        now = dt.utcnow().isoformat()
+        for job_id in job_ids:
+            self.execute(
+                "UPDATE pdf_jobs SET status = 'failed', error = ?, updated_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (error, now, job_id),
+            )
+
+    def get_job(self, job_id: str):
+        rows = self.execute("SELECT * FROM pdf_jobs WHERE id = ?", (job_id,))
+        if len(rows) == 0:
+            return None
+        return dict(rows[0])
@@ -0,0 +1,44 @@
+from app.database.connection import get_db
+from app.repositories.report_repository import CLIENT_MESSAGE_FILTER
+
+
+class PrecomputeRepository:
+    def __init__(self, client=None):
+        db = get_db(client)
+        self.message_collection = db["messages"]
+        self.checkpoint_collection = db["precompute_checkpoints"]
+
+    def new_messages_filter(self):
+        # Only client text messages change a chat's coefficient
+        return {"type": "chat", **CLIENT_MESSAGE_FILTER, "text": {"$exists": True}}
+
+    def watch_messages(self, resume_token=None, max_await_ms: int = 1000):
+        pipeline = [
+            {"$match": {"operationType": "insert"}},
+            {
+                "$match": {
+                    f"fullDocument.{field}": condition
+                    for field, condition in self.new_messages_filter().items()
+                }
+            },
+            {"$project": {"fullDocument.chat": 1}},
+        ]
+        return self.message_collection.watch(
+            pipeline, resume_after=resume_token, max_await_time_ms=max_await_ms
+        )
+
+    def get_messages_after(self, last_id=None, limit: int = 1000):
+        # Polling fallback, ObjectIds grow with insertion time
+        query = self.new_messages_filter()
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        return self.message_collection.find(query, {"chat": 1}).sort("_id", 1).limit(limit)
+
+    def get_checkpoint(self, name: str):
+        checkpoint = self.checkpoint_collection.find_one({"_id": name})
+        return checkpoint["value"] if checkpoint else None
+
+    def save_checkpoint(self, name: str, value):
+        self.checkpoint_collection.update_one(
+            {"_id": name}, {"$set": {"value": value}}, upsert=True
+        )
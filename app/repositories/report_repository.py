@@ -1,19 +1,152 @@
-from app.database.connection import chats_db, messages_db
+from app.database.connection import config, get_db
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+# Only the fields used to build reports are fetched
+MESSAGE_PROJECTION = {"_id": 1, "is_out": 1, "text": 1, "timestamp": 1, "send_date": 1}
+
+# Messages sent in the same instant are ordered by _id
+MESSAGE_ORDER = [("send_date", 1), ("_id", 1)]
+
+# Client messages are the ones whose is_out is falsy (false, null, 0 or missing), as in
+# an aggregation {"$not": "$is_out"}
+CLIENT_MESSAGE_FILTER = {"is_out": {"$in": [False, None, 0]}}
+
+message_batch_size = config.getint("MONGODB", "MESSAGE_BATCH_SIZE", fallback=1000)
 
 
 class ReportRepository:
-    def __init__(self):
-        self.chat_collection = chats_db
-        self.message_collection = messages_db
+    def __init__(self, client=None):
+        db = get_db(client)
+        self.chat_collection = db["chats"]
+        self.message_collection = db["messages"]
+        self.chat_state_collection = db["chat_sentiment_states"]
 
-    def get_chat_id(self, account_id: str, wa_chat_id: str):
-        query = {"account": ObjectId(account_id), "wa_chat_id": wa_chat_id}
-        output = self.chat_collection.find(query)
-        # This conversion is here to be able to know if the query returned any results
-        output = list(output)
-        return output
+    def chat_query(self, account_id: str, wa_chat_id: str):
+        return {"account": ObjectId(account_id), "wa_chat_id": wa_chat_id}
 
-    def get_chat_messages(self, chat_id: str):
+    def messages_query(self, chat_id: str, after=None, after_id=None):
         query = {"chat": ObjectId(chat_id), "type": "chat", "text": {"$exists": "true"}}
-        return self.message_collection.find(query).sort("send_date", 1)
+        # Only fetch messages after the last processed one, including the ones sent in
+        # the same instant but later in the message order
+        if after is not None and after_id is not None:
+            query["$or"] = [
+                {"send_date": {"$gt": after}},
+                {"send_date": after, "_id": {"$gt": after_id}},
+            ]
+        elif after is not None:
+            query["send_date"] = {"$gt": after}
+        return query
+
+    def version_query(self, chat_id: str):
+        # Matches on the chat_type_send_date_id index prefix only, so it can be answered
+        # from the index
+        return {"chat": ObjectId(chat_id), "type": "chat"}
+
+    def get_chat_id(self, account_id: str, wa_chat_id: str):
+        query = self.chat_query(account_id, wa_chat_id)
+        return self.chat_collection.find_one(query, {"_id": 1})
+
+    def get_chat_messages(self, chat_id: str, after=None, after_id=None):
+        query = self.messages_query(chat_id, after, after_id)
+        return (
+            self.message_collection.find(query, MESSAGE_PROJECTION)
+            .sort(MESSAGE_ORDER)
+            .batch_size(message_batch_size)
+        )
+
+    def count_chat_messages(self, chat_id: str, limit: int = 0):
+        query = self.messages_query(chat_id)
+        return self.message_collection.count_documents(query, limit=limit)
+
+    def get_last_message(self, chat_id: str):
+        return self.message_collection.find_one(
+            self.version_query(chat_id),
+            {"_id": 1, "send_date": 1},
+            sort=[("send_date", -1), ("_id", -1)],
+        )
+
+    def count_version_messages(self, chat_id: str):
+        return self.message_collection.count_documents(self.version_query(chat_id))
+
+    def client_messages_query(self, chat_id: str, after=None, after_id=None):
+        return {**self.messages_query(chat_id, after, after_id), **CLIENT_MESSAGE_FILTER}
+
+    def count_client_messages(self, chat_id: str, after=None, after_id=None):
+        query = self.client_messages_query(chat_id, after, after_id)
+        return self.message_collection.count_documents(query)
+
+    def get_next_client_message(self, chat_id: str, after, after_id=None):
+        # First client message after a checkpoint, walking the index forward from it
+        return self.message_collection.find_one(
+            self.client_messages_query(chat_id, after, after_id),
+            {"_id": 1, "send_date": 1},
+            sort=MESSAGE_ORDER,
+        )
+
+    def get_recent_client_messages(self, chat_id: str, limit: int):
+        # Newest first, walking the send_date index backwards
+        return (
+            self.message_collection.find(self.client_messages_query(chat_id), MESSAGE_PROJECTION)
+            .sort([("send_date", -1), ("_id", -1)])
+            .limit(limit)
+        )
+
+    def get_client_messages(
+        self, chat_id: str, after=None, after_id=None, first_order: int = 1
+    ):
+        # Client messages only, numbered by the server in message order (MongoDB 5.0+)
+        pipeline = [
+            {"$match": self.client_messages_query(chat_id, after, after_id)},
+            {
+                "$setWindowFields": {
+                    "sortBy": dict(MESSAGE_ORDER),
+                    "output": {"order_in_chat": {"$documentNumber": {}}},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 1,
+                    "text": 1,
+                    "timestamp": 1,
+                    "send_date": 1,
+                    "order_in_chat": {"$add": ["$order_in_chat", first_order - 1]},
+                }
+            },
+        ]
+        return self.message_collection.aggregate(pipeline, batchSize=message_batch_size)
+
+    def get_chat_ids(self, chat_keys: list):
+        # Single query for many (account_id, wa_chat_id) pairs
+        query = {"$or": [self.chat_query(a, w) for a, w in chat_keys]}
+        return self.chat_collection.find(query, {"_id": 1, "account": 1, "wa_chat_id": 1})
+
+    def get_chats_messages(self, chat_ids: list):
+        query = {
+            "chat": {"$in": [ObjectId(chat_id) for chat_id in chat_ids]},
+            "type": "chat",
+            "text": {"$exists": "true"},
+        }
+        projection = {**MESSAGE_PROJECTION, "chat": 1}
+        return (
+            self.message_collection.find(query, projection)
+            .sort(MESSAGE_ORDER)
+            .batch_size(message_batch_size)
+        )
+
+    def get_chat_state(self, chat_id: str):
+        return self.chat_state_collection.find_one({"_id": ObjectId(chat_id)})
+
+    def save_chat_state(
+        self, chat_id: str, state: dict, previous_send_date=None, previous_message_id=None
+    ):
+        # The state is only replaced if nobody else folded messages since it was read
+        query = {
+            "_id": ObjectId(chat_id),
+            "last_send_date": previous_send_date,
+            "last_message_id": previous_message_id,
+        }
+        try:
+            self.chat_state_collection.update_one(query, {"$set": state}, upsert=True)
+        except DuplicateKeyError:
+            pass
@@ -0,0 +1,28 @@
+from app.database.connection import get_db
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+
+class SentimentCacheRepository:
+    def __init__(self, client=None):
+        self.sentiment_collection = get_db(client)["message_sentiments"]
+
+    def get_compounds(self, keys: list):
+        query = {"_id": {"$in": keys}}
+        projection = {"compound": 1}
+        output = self.sentiment_collection.find(query, projection)
+        return {entry["_id"]: entry["compound"] for entry in output}
+
+    def save_compounds(self, compounds: dict):
+        if len(compounds) == 0:
+            return
+
+        # Compounds never change for a given key, so existing entries are kept as they are:
+        # their inserts fail with a duplicate key and the other inserts still go through
+        documents = [{"_id": key, "compound": value} for key, value in compounds.items()]
+        try:
+            self.sentiment_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as err:
+            if any(error["code"] != DUPLICATE_KEY for error in err.details["writeErrors"]):
+                raise
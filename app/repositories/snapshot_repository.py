@@ -0,0 +1,67 @@
+from app.database.connection import get_db
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class SnapshotRepository:
+    def __init__(self, client=None):
+        db = get_db(client)
+        self.snapshot_collection = db["sentiment_snapshots"]
+        self.chat_state_collection = db["chat_sentiment_states"]
+
+    def swap_chat_contribution(self, chat_id: str, day, coef: float):
+        # Atomically stores the chat's contribution for the day and returns the previous one
+        previous = self.chat_state_collection.find_one_and_update(
+            {"_id": ObjectId(chat_id)},
+            {"$set": {"snapshot_day": day, "snapshot_coef": coef}},
+            projection={"snapshot_day": 1, "snapshot_coef": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+        return previous or {}
+
+    def get_cumulative(self, account_id: str, day, inclusive: bool = True):
+        # Cumulative sums of the last snapshot up to the given day
+        operator = "$lte" if inclusive else "$lt"
+        snapshot = self.snapshot_collection.find_one(
+            {"account": ObjectId(account_id), "day": {operator: day}},
+            {"cum_coef_sum": 1, "cum_chat_count": 1},
+            sort=[("day", -1)],
+        )
+        if snapshot is None:
+            return 0.0, 0
+        return snapshot["cum_coef_sum"], snapshot["cum_chat_count"]
+
+    def add_to_day(self, account_id: str, day, coef_delta: float, count_delta: int):
+        account = ObjectId(account_id)
+
+        # A new day starts from the cumulative sums of the previous snapshot. Reports are
+        # recorded on the current day, so earlier days do not change meanwhile
+        cum_coef_sum, cum_chat_count = self.get_cumulative(account_id, day, inclusive=False)
+        try:
+            self.snapshot_collection.update_one(
+                {"account": account, "day": day},
+                {
+                    "$setOnInsert": {
+                        "coef_sum": 0.0,
+                        "chat_count": 0,
+                        "cum_coef_sum": cum_coef_sum,
+                        "cum_chat_count": cum_chat_count,
+                    }
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Another report created the day snapshot first
+            pass
+
+        self.snapshot_collection.update_one(
+            {"account": account, "day": day},
+            {"$inc": {"coef_sum": coef_delta, "chat_count": count_delta}},
+        )
+        # The day and every later snapshot carry the new value in their cumulative sums
+        self.snapshot_collection.update_many(
+            {"account": account, "day": {"$gte": day}},
+            {"$inc": {"cum_coef_sum": coef_delta, "cum_chat_count": count_delta}},
+        )
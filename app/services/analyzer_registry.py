@@ -0,0 +1,53 @@
+import importlib
+import threading
+
+
+class AnalyzerRegistry:
+    # Bump whenever lexicons or the compound formula change, cached compounds are
+    # keyed by this version
+    model_version = "leia-vader-1"
+
+    # Analyzers only read their lexicons after being built, so a single instance
+    # of each model can be shared by every request thread of the process. Their modules
+    # are imported on first use, so workers that never classify do not load them
+    _factories = {
+        "leia": ("LeIA", "SentimentIntensityAnalyzer"),
+        "emoji": ("vaderSentiment.vaderSentiment", "SentimentIntensityAnalyzer"),
+    }
+    _instances = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str):
+        analyzer = cls._instances.get(name)
+        if analyzer is not None:
+            return analyzer
+
+        with cls._lock:
+            # Another thread may have loaded the lexicon while we waited
+            analyzer = cls._instances.get(name)
+            if analyzer is None:
+                module_name, class_name = cls._factories[name]
+                analyzer_class = getattr(importlib.import_module(module_name), class_name)
+                analyzer = analyzer_class()
+                cls._instances[name] = analyzer
+
+        return analyzer
+
+    @classmethod
+    def leia(cls):
+        return cls.get("leia")
+
+    @classmethod
+    def emoji(cls):
+        return cls.get("emoji")
+
+    @classmethod
+    def warm_up(cls):
+        for name in cls._factories:
+            cls.get(name)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._instances.clear()
@@ -0,0 +1,157 @@
+import asyncio
+import configparser
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from app.repositories.async_report_repository import AsyncReportRepository
+from app.exceptions.errors import InexistantChat
+from app.services.metrics import StageTimer, chat_messages, timed_stage
+from app.services.classification_pool import process_pool_threshold
+from app.services.report_service import ReportService, client_messages_pipeline
+from app.services.sentiment_cache import get_sentiment_cache
+from pymongo.errors import OperationFailure
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+cpu_workers = config.getint("ASYNC", "CPU_WORKERS", fallback=os.cpu_count() or 1)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_cpu_executor():
+    # Dataframe building and scoring run here so the event loop keeps serving I/O
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=cpu_workers, thread_name_prefix="report-cpu"
+            )
+    return _executor
+
+
+async def run_in_cpu_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), func, *args)
+
+
+class AsyncReportService(ReportService):
+    # Database calls are awaited on the event loop, CPU stages reuse the ReportService
+    # implementation in the executor. client is a Motor client, sync_client the pymongo
+    # client the sentiment cache uses from the executor
+    def __init__(self, client=None, sync_client=None):
+        self.report_repository = AsyncReportRepository(client)
+        self.sentiment_cache = get_sentiment_cache(sync_client)
+        self.process_pool_threshold = process_pool_threshold
+
+    @timed_stage("chat_lookup")
+    async def get_chat_id(self, account_id: str, wa_chat_id: str):
+        chat_entry = await self.report_repository.get_chat_id(account_id, wa_chat_id)
+
+        if chat_entry is None:
+            raise InexistantChat("Chat não encontrado")
+
+        chat_id = chat_entry["_id"]
+        return chat_id
+
+    @timed_stage("state_load")
+    async def get_precomputed_report(self, chat_id):
+        state = await self.report_repository.get_chat_state(chat_id)
+        if state is None or "coefficient" not in state:
+            return None
+        next_message = await self.report_repository.get_next_client_message(
+            chat_id, state["last_send_date"], state.get("last_message_id")
+        )
+        return self.check_precomputed_report(chat_id, state, next_message)
+
+    @timed_stage("version")
+    async def get_chat_version(self, chat_id):
+        last_message, n_messages = await asyncio.gather(
+            self.report_repository.get_last_message(chat_id),
+            self.report_repository.count_version_messages(chat_id),
+        )
+        return self.make_chat_version(chat_id, last_message, n_messages)
+
+    async def get_client_messages_df(
+        self, chat_id: str, after=None, after_id=None, first_order: int = 1
+    ):
+        # Returns the client messages dataframe and the last fetched message
+        if client_messages_pipeline:
+            cursor = self.report_repository.get_client_messages(
+                chat_id, after, after_id, first_order
+            )
+            try:
+                # The first report's chat count runs alongside the fetch and is part of
+                # its observation
+                with StageTimer("fetch"):
+                    if after is None:
+                        messages, n_chat_messages = await asyncio.gather(
+                            cursor.to_list(None),
+                            self.report_repository.count_chat_messages(chat_id, limit=3),
+                        )
+                    else:
+                        messages, n_chat_messages = await cursor.to_list(None), None
+            except OperationFailure:
+                # Servers without $setWindowFields use the regular query below
+                messages = None
+
+            if messages is not None:
+                return await run_in_cpu_executor(
+                    self.make_client_messages_df, messages, n_chat_messages
+                )
+
+        with StageTimer("fetch"):
+            messages = await self.report_repository.get_chat_messages(
+                chat_id, after, after_id
+            ).to_list(None)
+        return await run_in_cpu_executor(self.make_chat_messages_df, messages, after, first_order)
+
+    async def count_client_messages(self, chat_id: str, state: dict = None):
+        newer = await self.report_repository.count_client_messages(
+            chat_id, *self.make_count_checkpoint(state)
+        )
+        return self.make_client_message_count(state, newer)
+
+    async def calculate_recent_coef(self, chat_id: str, tolerance: float):
+        with StageTimer("state_load"):
+            state = await self.report_repository.get_chat_state(chat_id)
+
+        with StageTimer("count"):
+            n_chat_messages, n_messages = await asyncio.gather(
+                self.report_repository.count_chat_messages(chat_id, limit=3),
+                self.count_client_messages(chat_id, state),
+            )
+        window = self.check_recent_window(n_chat_messages, n_messages, tolerance)
+
+        with StageTimer("fetch"):
+            recent_messages = await self.report_repository.get_recent_client_messages(
+                chat_id, window
+            ).to_list(None)
+        chat_messages.observe("fetched", len(recent_messages))
+
+        return await run_in_cpu_executor(self.score_recent_messages, recent_messages, n_messages)
+
+    async def calculate_incremental_coef(self, chat_id: str):
+        with StageTimer("state_load"):
+            state = self.make_resume_state(await self.report_repository.get_chat_state(chat_id))
+
+        client_messages_df, last_message = await self.get_client_messages_df(
+            chat_id,
+            after=state["last_send_date"],
+            after_id=state.get("last_message_id"),
+            first_order=state["client_message_count"] + 1,
+        )
+
+        if last_message is not None:
+            new_state = await run_in_cpu_executor(
+                self.fold_client_messages, state, client_messages_df, last_message
+            )
+            with StageTimer("state_save"):
+                await self.report_repository.save_chat_state(
+                    chat_id, new_state, state["last_send_date"], state.get("last_message_id")
+                )
+            state = new_state
+
+        return self.make_state_coef(state)
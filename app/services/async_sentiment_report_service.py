@@ -0,0 +1,73 @@
+from app.services.async_report_service import AsyncReportService, run_in_cpu_executor
+from app.services.sentiment_report_service import SentimentReportService
+from app.services.snapshot_service import SnapshotService
+from app.services.report_result_cache import report_result_cache
+from app.services.precompute_service import precompute_enabled
+from datetime import datetime as dt
+
+
+class AsyncSentimentReportService(SentimentReportService):
+    # Same flow as SentimentReportService, database calls are awaited and the
+    # snapshot is recorded in the executor. Decisions reuse the shared helpers
+    def __init__(self, client=None, sync_client=None):
+        self.report_service = AsyncReportService(client, sync_client)
+        self.snapshot_service = SnapshotService(sync_client)
+        self.result_cache = report_result_cache
+        self.precompute_enabled = precompute_enabled
+
+    async def get_chat_id(self, chat_key: tuple, cached_report: dict = None):
+        if cached_report is not None:
+            return cached_report["chat_id"]
+        return await self.report_service.get_chat_id(*chat_key)
+
+    async def get_chat_version(self, chat_id):
+        if self.precompute_enabled:
+            precomputed = await self.report_service.get_precomputed_report(chat_id)
+            if precomputed is not None:
+                return precomputed
+        return await self.report_service.get_chat_version(chat_id), None
+
+    async def record_report(
+        self, chat_key: tuple, chat_id, report: dict, served_from: dict = None
+    ):
+        today = self.snapshot_service.snapshot_day(dt.utcnow())
+        if not self.needs_recording(served_from, today):
+            return
+
+        await run_in_cpu_executor(
+            self.snapshot_service.record_chat_sentiment,
+            chat_key[0],
+            chat_id,
+            report["coefficient"],
+            today,
+        )
+        self.result_cache.put(
+            chat_key, chat_id, report["version"], report["coefficient"], report["label"], today
+        )
+
+    async def get_report(self, account_id: str, wa_chat_id: str):
+        chat_key = (account_id, wa_chat_id)
+        cached_report = self.result_cache.get(chat_key)
+
+        chat_id = await self.get_chat_id(chat_key, cached_report)
+        version, coefficient = await self.get_chat_version(chat_id)
+
+        served_from = self.match_cached_report(cached_report, version)
+        if served_from is not None:
+            coefficient, label = served_from["coefficient"], served_from["label"]
+        else:
+            if coefficient is None:
+                coefficient = await self.report_service.calculate_incremental_coef(chat_id)
+            label = self.report_service.generate_sentiment_label(coefficient)
+
+        report = {"version": version, "coefficient": coefficient, "label": label}
+        await self.record_report(chat_key, chat_id, report, served_from)
+        return report
+
+    async def get_recent_report(self, account_id: str, wa_chat_id: str, tolerance: float):
+        chat_key = (account_id, wa_chat_id)
+        chat_id = await self.get_chat_id(chat_key, self.result_cache.get(chat_key))
+
+        result = await self.report_service.calculate_recent_coef(chat_id, tolerance)
+        result["label"] = self.report_service.generate_sentiment_label(result["coefficient"])
+        return result
@@ -0,0 +1,214 @@
+import configparser
+import glob
+import multiprocessing
+import os
+import time
+
+import pandas as pd
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from app.repositories.batch_repository import BatchRepository
+from app.services.classification_pool import warm_up
+from app.services.report_service import ReportService
+from app.exceptions.errors import VoidChatHistory, NoClientMessages
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+batch_workers = config.getint("BATCH", "WORKERS", fallback=os.cpu_count() or 1)
+# Chats sent to a worker at a time, their messages are read with a single query
+batch_chunk_size = config.getint("BATCH", "CHUNK_SIZE", fallback=50)
+# Results written (and checkpointed) per bulk write
+batch_flush_size = config.getint("BATCH", "FLUSH_SIZE", fallback=1000)
+
+_worker_service = None
+
+
+def init_batch_worker():
+    global _worker_service
+    warm_up()
+    _worker_service = ReportService()
+    # Chats are already spread across the batch workers, a large chat is not sharded
+    # again over a nested classification pool
+    _worker_service.process_pool_threshold = float("inf")
+
+
+def score_chat_chunk(chat_ids: list) -> list:
+    report_service = _worker_service
+
+    chats_messages = {chat_id: [] for chat_id in chat_ids}
+    for m in report_service.report_repository.get_chats_messages(chat_ids):
+        chats_messages[m["chat"]].append(m)
+
+    results = []
+    for chat_id in chat_ids:
+        messages = chats_messages[chat_id]
+        result = {
+            "chat_id": chat_id,
+            "messages": len(messages),
+            "client_messages": sum(1 for m in messages if not m.get("is_out")),
+        }
+        try:
+            coef = report_service.calculate_chat_coef(messages)
+        except (VoidChatHistory, NoClientMessages) as err:
+            result["error"] = str(err)
+            result["error_type"] = type(err).__name__
+        else:
+            result["coefficient"] = coef
+            result["label"] = report_service.generate_sentiment_label(coef)
+        results.append(result)
+
+    return results
+
+
+class MongoResultWriter:
+    def __init__(self, run_id: str, account_id: str, client=None):
+        self.batch_repository = BatchRepository(client)
+        self.run_id = run_id
+        self.account_id = account_id
+
+    @property
+    def output(self):
+        return self.batch_repository.result_collection.name
+
+    def write(self, results: list):
+        self.batch_repository.save_results(self.run_id, self.account_id, results)
+
+    def clear(self):
+        self.batch_repository.delete_results(self.run_id)
+
+
+class ParquetResultWriter:
+    # One part file per flush, named after its first chat, so a resumed run rewrites
+    # the part it was writing instead of duplicating its rows
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def output(self):
+        return self.directory
+
+    def write(self, results: list):
+        df = pd.DataFrame(
+            results,
+            columns=[
+                "chat_id",
+                "label",
+                "coefficient",
+                "messages",
+                "client_messages",
+                "error",
+                "error_type",
+            ],
+        )
+        df["chat_id"] = df["chat_id"].astype(str)
+        path = os.path.join(self.directory, f"part-{df['chat_id'].iloc[0]}.parquet")
+        df.to_parquet(path, index=False)
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.directory, "part-*.parquet")):
+            os.remove(path)
+
+
+class BatchScoringService:
+    def __init__(
+        self,
+        account_id: str,
+        run_id: str,
+        writer,
+        workers: int = batch_workers,
+        chunk_size: int = batch_chunk_size,
+        flush_size: int = batch_flush_size,
+        client=None,
+    ):
+        self.batch_repository = BatchRepository(client)
+        self.account_id = account_id
+        self.run_id = run_id
+        self.writer = writer
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.flush_size = flush_size
+
+    def chat_id_chunks(self, after=None):
+        chat_ids = (
+            chat["_id"]
+            for chat in self.batch_repository.get_account_chat_ids(self.account_id, after)
+        )
+        while True:
+            chunk = list(islice(chat_ids, self.chunk_size))
+            if len(chunk) == 0:
+                return
+            yield chunk
+
+    def score_account(self, restart: bool = False, progress=None):
+        run = None if restart else self.batch_repository.get_run(self.run_id)
+        if run is not None and str(run["account"]) != self.account_id:
+            raise ValueError(f"Run '{self.run_id}' belongs to account {run['account']}")
+        if restart:
+            # Results of chats deleted since the earlier run would otherwise be kept
+            self.writer.clear()
+        if run is None:
+            self.batch_repository.start_run(self.run_id, self.account_id, self.writer.output)
+            run = self.batch_repository.get_run(self.run_id)
+
+        last_chat_id = run["last_chat_id"]
+        counts = {"scored": run["scored"], "failed": run["failed"]}
+        resumed = counts["scored"] + counts["failed"]
+        total = resumed + self.batch_repository.count_account_chats(self.account_id, last_chat_id)
+
+        buffer = []
+        started = time.perf_counter()
+
+        def flush():
+            nonlocal last_chat_id
+            if len(buffer) == 0:
+                return
+            self.writer.write(buffer)
+            last_chat_id = buffer[-1]["chat_id"]
+            self.batch_repository.save_run_checkpoint(
+                self.run_id, last_chat_id, counts["scored"], counts["failed"]
+            )
+            buffer.clear()
+
+        def collect(results):
+            for result in results:
+                counts["failed" if "error" in result else "scored"] += 1
+            buffer.extend(results)
+            if len(buffer) >= self.flush_size:
+                flush()
+            if progress is not None:
+                progress(counts["scored"] + counts["failed"], total, time.perf_counter() - started)
+
+        # Futures are collected in submission order, so everything before the checkpoint
+        # has been written. A few chunks per worker keeps them busy without reading the
+        # whole account ahead
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_batch_worker,
+        ) as pool:
+            pending = deque()
+            for chunk in self.chat_id_chunks(last_chat_id):
+                pending.append(pool.submit(score_chat_chunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+        flush()
+        self.batch_repository.save_run_checkpoint(
+            self.run_id, last_chat_id, counts["scored"], counts["failed"], finished=True
+        )
+
+        elapsed = time.perf_counter() - started
+        chats = counts["scored"] + counts["failed"] - resumed
+        return {
+            **counts,
+            "chats": chats,
+            "resumed": resumed,
+            "elapsed": elapsed,
+            "chats_per_second": chats / elapsed if elapsed > 0 else 0.0,
+        }
@@ -0,0 +1,78 @@
+import configparser
+import multiprocessing
+import os
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from app.services.analyzer_registry import AnalyzerRegistry
+from app.services.emoji_splitter import load_emoji_tables, split_emoji_sections
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+# Chats with more distinct texts to score than this are sharded across processes
+process_pool_threshold = config.getint("CLASSIFICATION", "PROCESS_POOL_THRESHOLD", fallback=5000)
+process_pool_workers = config.getint(
+    "CLASSIFICATION", "PROCESS_POOL_WORKERS", fallback=os.cpu_count() or 1
+)
+# Load analyzers and emoji tables when the app is created instead of on the first report
+warm_up_on_start = config.getboolean("CLASSIFICATION", "WARM_UP", fallback=False)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def warm_up():
+    # Loads everything scoring needs up front instead of on the first message
+    AnalyzerRegistry.warm_up()
+    load_emoji_tables()
+
+
+def message_compound(message: str) -> float:
+    # Shared analyzers, lexicons are loaded only once per process
+    leia = AnalyzerRegistry.leia()
+    vader = AnalyzerRegistry.emoji()
+
+    split_message = split_emoji_sections(message)
+
+    # Get text message compound
+    text_compound = leia.polarity_scores(split_message["text"])["compound"]
+
+    # Get emojis compound
+    emoji_compound = vader.polarity_scores(split_message["emojis"])["compound"]
+
+    # Emoji compound has a greater weight than text compound because it usually
+    # holds more sentiment that pure text
+    return round((text_compound + 2 * emoji_compound) / 3, 4)
+
+
+def score_messages(messages: list) -> list:
+    return [message_compound(message) for message in messages]
+
+
+def get_classification_pool():
+    # Workers are spawned rather than forked from the threaded web process, and load
+    # their analyzers once when they start
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=process_pool_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_up,
+            )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def score_messages_in_pool(messages: list) -> list:
+    # A few chunks per worker balances uneven message lengths, map keeps their order
+    n_chunks = process_pool_workers * 4
+    chunk_size = -(-len(messages) // n_chunks)
+    chunks = [messages[i : i + chunk_size] for i in range(0, len(messages), chunk_size)]
+
+    compounds = []
+    for chunk_compounds in get_classification_pool().map(score_messages, chunks):
+        compounds += chunk_compounds
+    return compounds
@@ -0,0 +1,146 @@
+import re
+import threading
+
+from collections import Counter
+from itertools import accumulate
+
+_ZWJ = "\u200d"
+
+_emoji_trie = None
+_emoji_run = None
+_tables_lock = threading.Lock()
+
+
+def _character_class(characters):
+    # Consecutive code points are merged into ranges to keep the class short
+    code_points = sorted(ord(c) for c in characters)
+    ranges = []
+    for code_point in code_points:
+        if ranges and ranges[-1][1] == code_point - 1:
+            ranges[-1][1] = code_point
+        else:
+            ranges.append([code_point, code_point])
+
+    sections = []
+    for first, last in ranges:
+        if first == last:
+            sections.append(re.escape(chr(first)))
+        else:
+            sections.append(f"{re.escape(chr(first))}-{re.escape(chr(last))}")
+
+    return "[" + "".join(sections) + "]"
+
+
+def _build_trie(emojis):
+    trie = {}
+    for e in emojis:
+        node = trie
+        for char in e:
+            node = node.setdefault(char, {})
+        node[""] = True
+    return trie
+
+
+def load_emoji_tables():
+    # emoji's data is large, so it is imported and indexed on the first split (or at
+    # warm-up) rather than when the module is imported
+    global _emoji_trie, _emoji_run
+    if _emoji_trie is None:
+        with _tables_lock:
+            if _emoji_trie is None:
+                import emoji
+
+                # Runs of code points that appear in any emoji, so the regex engine
+                # skips plain text in C and only the runs are walked in Python
+                _emoji_run = re.compile(
+                    f"({_character_class({char for e in emoji.EMOJI_DATA for char in e})}+)"
+                )
+                _emoji_trie = _build_trie(emoji.EMOJI_DATA)
+    return _emoji_trie, _emoji_run
+
+
+def _split_run(trie: dict, run: str, text_sections: list, emoji_sections: list):
+    # Same walk as emoji's search tree: it always follows the next code point when the
+    # tree allows it and only matches if the node where it stops is an emoji
+    i = 0
+    length = len(run)
+    while i < length:
+        node = trie.get(run[i])
+        j = i + 1
+        if node is not None:
+            while j < length and run[j] in node:
+                node = node[run[j]]
+                j += 1
+
+        if node is not None and "" in node:
+            emoji_sections.append(run[i:j])
+            i = j
+        else:
+            text_sections.append(run[i])
+            i += 1
+
+
+def _replace_split(message: str):
+    # Original splitter, kept for the rare messages the single scan cannot reproduce
+    import emoji
+
+    emoji_list = emoji.emoji_list(message)
+    emojis = ""
+    text = message
+
+    for e in emoji_list:
+        # Add emoji to emoji list
+        emojis += e["emoji"]
+
+        # Remove emoji from text
+        text = text.replace(e["emoji"], "")
+
+    return {"text": text, "emojis": emojis}
+
+
+def split_emoji_sections(message: str):
+    trie, emoji_run = load_emoji_tables()
+
+    # Sections alternate between plain text and emoji runs: [text, run, text, ..., text]
+    sections = emoji_run.split(message)
+
+    # Case where the message does not have emojis
+    if len(sections) == 1:
+        return {"text": message, "emojis": ""}
+
+    text_sections = []
+    emoji_sections = []
+    for i, section in enumerate(sections):
+        if i % 2 == 0:
+            text_sections.append(section)
+        else:
+            _split_run(trie, section, text_sections, emoji_sections)
+
+    text = "".join(text_sections)
+    emojis = "".join(emoji_sections)
+
+    # Non-RGI ZWJ sequences, emojis nested in other emojis, emojis formed by joining
+    # the remaining text and emojis spanning two adjacent ones (🇷🇺 in 🇧🇷🇺🇸) are
+    # resolved by the original replace loop
+    if _ZWJ in text or _has_overlapping_emojis(message, text, emojis, emoji_sections):
+        return _replace_split(message)
+
+    return {"text": text, "emojis": emojis}
+
+
+def _has_overlapping_emojis(message: str, text: str, emojis: str, emoji_sections: list):
+    # The replace loop removes every occurrence of a found emoji, so the scan only
+    # matches it if the emoji occurs nowhere else than in its own sections
+    counts = Counter(emoji_sections)
+    boundaries = set(accumulate(map(len, emoji_sections), initial=0))
+    for e, count in counts.items():
+        if e in text or message.count(e) != count:
+            return True
+
+        start = emojis.find(e)
+        while start != -1:
+            if start not in boundaries:
+                return True
+            start = emojis.find(e, start + 1)
+
+    return False
@@ -0,0 +1,160 @@
+import asyncio
+import functools
+import threading
+import time
+
+from bisect import bisect_left
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of the histogram buckets, +Inf is implicit
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+MESSAGES_BUCKETS = (3, 10, 30, 100, 300, 1000, 3000, 10000, 30000, 100000)
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    # Per-bucket counts are kept apart and only made cumulative when rendered, so an
+    # observation is one bisect and three additions under the lock
+    def __init__(self, name: str, documentation: str, label: str, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+        for label_value, (counts, total, count) in sorted(series.items()):
+            labels = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else format_value(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {format_value(total)}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label: str):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: int = 1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+
+        for label_value, value in sorted(values.items()):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value}')
+        return lines
+
+
+# Metrics are kept per process, each worker exposes its own
+stage_duration = Histogram(
+    "report_stage_duration_seconds",
+    "Time spent in each stage of the report pipeline.",
+    "stage",
+    SECONDS_BUCKETS,
+)
+chat_messages = Histogram(
+    "report_chat_messages",
+    "Messages handled per report, fetched from MongoDB and written by the client.",
+    "kind",
+    MESSAGES_BUCKETS,
+)
+exceptions = Counter(
+    "report_exceptions_total",
+    "Exceptions raised while serving report requests, by type.",
+    "exception",
+)
+precomputed_reports = Counter(
+    "report_precomputed_total",
+    "Precomputed chat states read by /report/, by whether they were current or stale.",
+    "state",
+)
+
+METRICS = [stage_duration, chat_messages, exceptions, precomputed_reports]
+
+
+def count_exception(error: BaseException):
+    exceptions.inc(type(error).__name__)
+
+
+def count_unhandled_exception(sender, exception, **extra):
+    # Receiver of the got_request_exception signal, for errors that end in a 500
+    count_exception(exception)
+
+
+def timed_stage(stage: str):
+    # Records how long the decorated function (or coroutine) took, failures included
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    stage_duration.observe(stage, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stage_duration.observe(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class StageTimer:
+    # Context manager version of timed_stage, for stages inside a larger function
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stage_duration.observe(self.stage, time.perf_counter() - self.start)
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,107 @@
+import configparser
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+from app.database.s3_connection import s3_bucket
+from app.repositories.pdf_job_repository import PdfJobRepository
+from app.services.report_service import ReportService
+from app.exceptions.errors import (
+    VoidChatHistory,
+    NoClientMessages,
+    S3UploadError,
+)
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+pdf_workers = config.getint("PDF_JOBS", "WORKERS", fallback=2)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_pdf_executor():
+    # Created on first use so every (forked) worker process gets its own pool
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=pdf_workers, thread_name_prefix="pdf-report"
+            )
+    return _executor
+
+
+def is_process_alive(pid):
+    # This process was just started, a job recorded with its pid belongs to an
+    # earlier process that had the same pid
+    if pid is None or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def init_pdf_jobs():
+    # Run once when the app starts instead of on every request
+    pdf_job_repository = PdfJobRepository()
+    pdf_job_repository.create_table()
+
+    # Jobs only run in the process that queued them, so those of a process that is
+    # gone will never finish. Jobs of other live workers are left alone
+    orphaned_jobs = [
+        job["id"]
+        for job in pdf_job_repository.get_unfinished_jobs()
+        if not is_process_alive(job["pid"])
+    ]
+    pdf_job_repository.fail_jobs(
+        orphaned_jobs, "O processo que gerava o relatório foi encerrado, solicite-o novamente"
+    )
+    return orphaned_jobs
+
+
+class PdfJobService:
+    def __init__(self, client=None):
+        # The client is used for the chat messages, jobs are kept in the local store
+        self.client = client
+        self.pdf_job_repository = PdfJobRepository()
+
+    def submit_job(self, chat_id: str):
+        job_id = uuid4().hex
+        self.pdf_job_repository.create_job(job_id, str(chat_id))
+        get_pdf_executor().submit(self.run_job, job_id, str(chat_id))
+        return job_id
+
+    def get_job(self, job_id: str):
+        return self.pdf_job_repository.get_job(job_id)
+
+    def run_job(self, job_id: str, chat_id: str):
+        self.pdf_job_repository.update_job(job_id, "running")
+        report_service = ReportService(self.client)
+
+        try:
+            # Retrieve messages and calculate chat sentiment:
+            messages = report_service.get_chat_messages(chat_id)
+            coefficient = report_service.calculate_chat_coef(messages)
+
+            # Create pdf file and upload it to S3, the spooled file is removed afterwards:
+            formated_chat = report_service.format_chat(messages)
+            s3_key = f"report/{chat_id}/{job_id}.pdf"
+            with report_service.create_report(formated_chat, coefficient) as pdf_buffer:
+                report_service.update_file_to_s3(pdf_buffer, s3_bucket, s3_key)
+        except (VoidChatHistory, NoClientMessages, S3UploadError) as err:
+            self.pdf_job_repository.update_job(job_id, "failed", error=str(err))
+            return
+        except Exception as err:
+            # Jobs never stay "running" after an unexpected error
+            self.pdf_job_repository.update_job(
+                job_id, "failed", error=f"Erro inesperado ao gerar o relatório: {err}"
+            )
+            return
+
+        self.pdf_job_repository.update_job(job_id, "done", s3_key=s3_key)
@@ -0,0 +1,106 @@
+import configparser
+import logging
+import threading
+
+from app.repositories.precompute_repository import PrecomputeRepository
+from app.services.report_service import ReportService
+from app.exceptions.errors import VoidChatHistory, NoClientMessages
+from pymongo.errors import OperationFailure
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+# /report/ serves the coefficients kept by the worker instead of folding on request
+precompute_enabled = config.getboolean("PRECOMPUTE", "ENABLED", fallback=False)
+precompute_batch_size = config.getint("PRECOMPUTE", "BATCH_SIZE", fallback=1000)
+poll_interval = config.getfloat("PRECOMPUTE", "POLL_INTERVAL_SECONDS", fallback=5)
+max_await_ms = config.getint("PRECOMPUTE", "MAX_AWAIT_MS", fallback=1000)
+
+CHANGE_STREAM_CHECKPOINT = "messages_resume_token"
+POLLING_CHECKPOINT = "messages_last_id"
+
+# Server error codes: change streams need a replica set, and an old resume token
+# may have left the oplog
+CHANGE_STREAM_NOT_SUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+logger = logging.getLogger(__name__)
+
+
+class PrecomputeService:
+    # New messages only tell which chats to refresh, the refresh itself folds every
+    # message newer than the chat state. A missed or repeated event therefore only
+    # delays or repeats a refresh, it never skews a coefficient
+    def __init__(self, client=None):
+        self.precompute_repository = PrecomputeRepository(client)
+        self.report_service = ReportService(client)
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def refresh_chats(self, chat_ids):
+        refreshed = 0
+        for chat_id in chat_ids:
+            try:
+                self.report_service.calculate_incremental_coef(chat_id)
+            except (VoidChatHistory, NoClientMessages):
+                # Chats too short for a report are refreshed again with their next message
+                continue
+            refreshed += 1
+        return refreshed
+
+    def run(self, polling: bool = False):
+        if not polling:
+            try:
+                return self.run_change_stream()
+            except OperationFailure as err:
+                if err.code != CHANGE_STREAM_NOT_SUPPORTED:
+                    raise
+                logger.warning("Change streams are not supported, polling for new messages")
+        return self.run_polling()
+
+    def run_change_stream(self):
+        resume_token = self.precompute_repository.get_checkpoint(CHANGE_STREAM_CHECKPOINT)
+        try:
+            stream = self.precompute_repository.watch_messages(resume_token, max_await_ms)
+        except OperationFailure as err:
+            if err.code != CHANGE_STREAM_HISTORY_LOST:
+                raise
+            # Chats with messages in the lost window are folded whole on their next refresh
+            logger.warning("Resume token is no longer in the oplog, watching from now")
+            stream = self.precompute_repository.watch_messages(None, max_await_ms)
+
+        with stream:
+            while not self.stopped.is_set():
+                # Changes are drained in batches so a busy chat is refreshed once per batch
+                chat_ids = set()
+                for _ in range(precompute_batch_size):
+                    change = stream.try_next()
+                    if change is None:
+                        break
+                    chat_ids.add(change["fullDocument"]["chat"])
+
+                self.refresh_chats(chat_ids)
+
+                # Saved once the batch is folded, a restart resumes after the last saved batch
+                if stream.resume_token is not None and stream.resume_token != resume_token:
+                    resume_token = stream.resume_token
+                    self.precompute_repository.save_checkpoint(
+                        CHANGE_STREAM_CHECKPOINT, resume_token
+                    )
+
+    def run_polling(self):
+        # Without a checkpoint the first run walks the whole collection, backfilling chats
+        last_id = self.precompute_repository.get_checkpoint(POLLING_CHECKPOINT)
+        while not self.stopped.is_set():
+            messages = list(
+                self.precompute_repository.get_messages_after(last_id, precompute_batch_size)
+            )
+            if messages:
+                self.refresh_chats({m["chat"] for m in messages})
+                last_id = messages[-1]["_id"]
+                self.precompute_repository.save_checkpoint(POLLING_CHECKPOINT, last_id)
+
+            if len(messages) < precompute_batch_size:
+                self.stopped.wait(poll_interval)
@@ -0,0 +1,66 @@
+import configparser
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import threading
+
+from datetime import datetime as dt
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+# Requests carrying this header with the configured token are always profiled
+PROFILE_HEADER = "X-Profile-Token"
+
+profile_token = config.get("PROFILING", "TOKEN", fallback="")
+profile_sample_rate = config.getfloat("PROFILING", "SAMPLE_RATE", fallback=0.0)
+profile_directory = config.get("PROFILING", "DIRECTORY", fallback="profiles")
+
+logger = logging.getLogger(__name__)
+
+# A single request is profiled at a time per process, concurrent profilers would
+# slow every request down and newer Pythons refuse to run two at once
+_profile_lock = threading.Lock()
+
+
+def profiling_requested(token: str = None):
+    if token and profile_token and hmac.compare_digest(token, profile_token):
+        return True
+    return profile_sample_rate > 0 and random.random() < profile_sample_rate
+
+
+class RequestProfile:
+    # cProfile of the calling thread, written as a pstats file once stopped
+    def __init__(self, name: str):
+        self.name = re.sub(r"[^\w.-]", "_", name or "unknown")
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        try:
+            os.makedirs(profile_directory, exist_ok=True)
+            path = os.path.join(
+                profile_directory, f"{self.name}-{dt.utcnow():%Y%m%dT%H%M%S%f}.pstats"
+            )
+            self.profiler.dump_stats(path)
+        except OSError:
+            # A failed dump must not fail the profiled request
+            logger.exception("Could not write the request profile")
+        finally:
+            _profile_lock.release()
+
+
+def start_request_profile(token: str = None, name: str = None):
+    # Returns the running profile, or None when this request is not profiled
+    if not profiling_requested(token) or not _profile_lock.acquire(blocking=False):
+        return None
+
+    profile = RequestProfile(name)
+    profile.start()
+    return profile
@@ -0,0 +1,219 @@
+import configparser
+import threading
+
+from tempfile import SpooledTemporaryFile
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import (
+    SimpleDocTemplate,
+    Paragraph,
+    Spacer,
+    ListFlowable,
+    PageBreak,
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle as PS
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+# Reports above this size are spilled from memory to a temporary file
+spool_max_size = config.getint("PDF_JOBS", "SPOOL_MAX_SIZE_MB", fallback=4) * 1024 * 1024
+
+_styles = None
+_styles_lock = threading.Lock()
+
+
+def get_report_styles():
+    # Styles are only read while building, so one stylesheet serves the whole process
+    global _styles
+    with _styles_lock:
+        if _styles is None:
+            styles = getSampleStyleSheet()
+            # Creates a style for centered text
+            styles.add(PS(name="CenteredStyle", parent=styles["Heading3"], alignment=1))
+            _styles = styles
+    return _styles
+
+
+class LaidOutParagraph(Paragraph):
+    # Keeps the line breaking of the last width, static paragraphs always get the same
+    # frame width so their layout is only computed once
+    def wrap(self, availWidth, availHeight):
+        if getattr(self, "_laid_out_width", None) != availWidth:
+            self._laid_out_size = Paragraph.wrap(self, availWidth, availHeight)
+            self._laid_out_width = availWidth
+        return self._laid_out_size
+
+
+class ReportRenderer:
+    # Static flowables are laid out in place during a build, so they are cached per thread
+    _local = threading.local()
+
+    def __init__(self):
+        self.styles = get_report_styles()
+
+    def static_elements(self):
+        # Title and method page are the same for every report
+        elements = getattr(self._local, "static_elements", None)
+        if elements is None:
+            elements = self.build_static_elements()
+            self._local.static_elements = elements
+        return elements
+
+    def build_static_elements(self):
+        styles = self.styles
+        elements = []
+
+        # TITLE
+        title = LaidOutParagraph("Relatório de Análise de Sentimento do Chat", styles["Title"])
+        elements.append(title)
+        elements.append(Spacer(1, 20))
+
+        # SECTION - "Method for Sentiment Analysis"
+        section_title = LaidOutParagraph(
+            "Método para Análise de Sentimento", styles["Heading1"]
+        )
+        elements.append(section_title)
+
+        # SUBSECTION - "Method Description"
+        subtitle = LaidOutParagraph("Descrição do Método", styles["Heading2"])
+        elements.append(subtitle)
+        elements.append(Spacer(1, 10))
+
+        # TEXT - "method description"
+        method_introduction = (
+            "O método para a obtenção da estimativa do sentimento de um cliente durante "
+            "uma interação com o atendimento consiste em :"
+        )
+
+        text = LaidOutParagraph(method_introduction, styles["Normal"])
+        elements.append(text)
+        elements.append(Spacer(1, 10))
+
+        method_list = [
+            "Análise do sentimento de todas as mensagens dos clientes",
+            "Cálculo do peso de cada mensagem",
+            "Cálculo da média do sentimento do chat completo",
+            "Interpretação do resultado da análise",
+        ]
+
+        numbered_list = ListFlowable(
+            [
+                LaidOutParagraph(f"{item}", styles["Normal"])
+                for i, item in enumerate(method_list, start=1)
+            ],
+            bulletType="bullet",
+            leftIndent=20,
+        )
+        elements.append(numbered_list)
+        elements.append(Spacer(1, 10))
+
+        entry_1 = (
+            "O primeiro passo consiste na aplicação do modelo de aprendizado de máquina treinado para a "
+            "classificação do sentimento do cliente em cada uma das mensagens enviadas para o atendente, gerando assim "
+            'um nível estimado de satisfação do cliente que varia entre "Satisfeito", "Levemente Satisfeito", "Neutro"'
+            ', "Levemente Insatisfeito" ou "Insatisfeito".'
+        )
+
+        text = LaidOutParagraph(entry_1, styles["Normal"])
+        elements.append(text)
+        elements.append(Spacer(1, 10))
+
+        entry_2 = (
+            "O que se segue é a transformação das classificações dos sentimentos individuais "
+            "expressos em cada uma das mensagens em pesos matemáticos que compõem o sentimento do cliente "
+            "durante todo o atendimento. Esses pesos são definidos seguindo-se a metodologia formulada internamente"
+            " pelo time de Inteligência Artificial da ChatGuru."
+        )
+
+        text = LaidOutParagraph(entry_2, styles["Normal"])
+        elements.append(text)
+        elements.append(Spacer(1, 10))
+
+        entry_3 = (
+            "Usando-se parâmetros obtidos do chat completo e do modelo de IA da ChatGuru, é calculado um "
+            "coeficiente numérico de satisfação do atendimento completo."
+        )
+
+        text = LaidOutParagraph(entry_3, styles["Normal"])
+        elements.append(text)
+        elements.append(Spacer(1, 10))
+
+        entry_4 = (
+            "Por fim, esse coeficiente de satisfação é interpretado em termos não-matemáticos para ser "
+            "apreciado pelo contratante do serviço."
+        )
+
+        text = LaidOutParagraph(entry_4, styles["Normal"])
+        elements.append(text)
+        elements.append(Spacer(1, 20))
+        elements.append(PageBreak())
+
+        return elements
+
+    def build_chat_elements(self, formated_chat: list, sentiment_coef: float, sentiment_label: str):
+        styles = self.styles
+        elements = []
+
+        # SECTION - "Sentiment Analysis"
+        section_title = Paragraph("Análise de Sentimento", styles["Heading1"])
+        elements.append(section_title)
+
+        # SUBSECTION - "Chat Presentation"
+        subtitle = Paragraph("Apresentação do Chat", styles["Heading2"])
+        elements.append(subtitle)
+        elements.append(Spacer(1, 10))
+
+        # TEXT - "chat content"
+        for line in formated_chat:
+            chat = Paragraph(line, styles["Normal"])
+            elements.append(chat)
+            elements.append(Spacer(1, 5))
+
+        # SUBSECTION - "Analysis result"
+        subtitle = Paragraph("Resultados da Análise", styles["Heading2"])
+        elements.append(subtitle)
+        elements.append(Spacer(1, 10))
+
+        # TEXT - "analysis result intro"
+        analysis_result = (
+            "Ao se aplicar o método já descrito neste relatório, o coeficiente de satisfação do usuário na "
+            "conversa apresentada como objeto de análise foi de:"
+        )
+        text = Paragraph(analysis_result, styles["Normal"])
+        elements.append(text)
+        elements.append(Spacer(1, 8))
+
+        # TEXT - "sentiment coefficient"
+        str_coef = str(round(sentiment_coef, 3))
+        text = f"coeficiente de satisfação = {str_coef}"
+        centered_text = Paragraph(text, styles["CenteredStyle"])
+        elements.append(centered_text)
+        elements.append(Spacer(1, 10))
+
+        # TEXT - "result interpretation"
+        interpretation = f"Dado o coeficiente de satisfação apresentado, podemos estimar que o cliente se sentiu:"
+        text = Paragraph(interpretation, styles["Normal"])
+        elements.append(text)
+
+        centered_text = Paragraph(sentiment_label, styles["CenteredStyle"])
+        elements.append(centered_text)
+        elements.append(Spacer(1, 10))
+
+        return elements
+
+    def render(self, formated_chat: list, sentiment_coef: float, sentiment_label: str):
+        # Create buffer to hold report information, large reports go to disk
+        pdf_buffer = SpooledTemporaryFile(max_size=spool_max_size)
+        # Create document
+        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+
+        # Only the chat transcript and results are created for each report
+        elements = list(self.static_elements())
+        elements += self.build_chat_elements(formated_chat, sentiment_coef, sentiment_label)
+
+        doc.build(elements)
+
+        # Move buffer position to the beginning
+        pdf_buffer.seek(0)
+
+        return pdf_buffer
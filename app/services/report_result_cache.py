@@ -0,0 +1,40 @@
+import configparser
+import time
+
+from app.services.sentiment_cache import LRUCache
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+result_cache_size = config.getint("RESULT_CACHE", "SIZE", fallback=10000)
+result_cache_ttl = config.getfloat("RESULT_CACHE", "TTL_SECONDS", fallback=300)
+
+
+class ReportResultCache:
+    # Last report of each (account_id, wa_chat_id), valid while the chat version is the
+    # same. The TTL bounds how long a deleted or re-keyed chat can be served from here
+    def __init__(self, max_size: int = result_cache_size, ttl: float = result_cache_ttl):
+        self.entries = LRUCache(max_size)
+        self.ttl = ttl
+
+    def get(self, chat_key: tuple):
+        entry = self.entries.get(chat_key)
+        if entry is None or entry["expires_at"] < time.monotonic():
+            return None
+        return entry
+
+    def put(self, chat_key: tuple, chat_id, version: str, coef: float, label: str, snapshot_day):
+        self.entries.put(
+            chat_key,
+            {
+                "chat_id": chat_id,
+                "version": version,
+                "coefficient": coef,
+                "label": label,
+                "snapshot_day": snapshot_day,
+                "expires_at": time.monotonic() + self.ttl,
+            },
+        )
+
+
+report_result_cache = ReportResultCache()
@@ -1,6 +1,7 @@
+import configparser
+import hashlib
+import numpy as np
 import pandas as pd
-import emoji
-import boto3
 
 from app.repositories.report_repository import ReportRepository
 from app.exceptions.errors import (
@@ -9,84 +10,205 @@ from app.exceptions.errors import (
     NoClientMessages,
     S3UploadError,
 )
-from io import BytesIO
-from LeIA import SentimentIntensityAnalyzer as LeiaAnalyzer
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer as EmojiAnalyzer
-
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Spacer,
-    ListFlowable,
-    PageBreak,
+from app.services.classification_pool import (
+    message_compound,
+    process_pool_threshold,
+    score_messages_in_pool,
+)
+from app.services.analyzer_registry import AnalyzerRegistry
+from app.services.emoji_splitter import split_emoji_sections
+from app.services.metrics import StageTimer, chat_messages, precomputed_reports, timed_stage
+from app.services.sentiment_cache import get_sentiment_cache
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+from operator import itemgetter
+
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+# Let MongoDB number and filter client messages with an aggregation pipeline
+client_messages_pipeline = config.getboolean(
+    "MONGODB", "CLIENT_MESSAGES_PIPELINE", fallback=False
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle as PS
 
 
 class ReportService:
-    def __init__(self):
-        self.report_repository = ReportRepository()
+    def __init__(self, client=None):
+        self.report_repository = ReportRepository(client)
+        self.sentiment_cache = get_sentiment_cache(client)
+        self.process_pool_threshold = process_pool_threshold
 
+    @timed_stage("chat_lookup")
     def get_chat_id(self, account_id: str, wa_chat_id: str):
-        chat_entries = self.report_repository.get_chat_id(account_id, wa_chat_id)
-        
-        if len(chat_entries) == 0:
+        chat_entry = self.report_repository.get_chat_id(account_id, wa_chat_id)
+
+        if chat_entry is None:
             raise InexistantChat("Chat não encontrado")
 
-        chat_entry = chat_entries[0]
         chat_id = chat_entry["_id"]
         return chat_id
 
-    def get_chat_messages(self, chat_id: str):
-        messages = self.report_repository.get_chat_messages(chat_id)
-        messages = list(messages)
+    def make_chat_version(self, chat_id, last_message: dict, n_messages: int):
+        # A new or deleted message changes the last message or the count.
+        # The model version is included since new lexicons change the result too
+        if last_message is None:
+            last_id, last_send_date = "", ""
+        else:
+            last_id, last_send_date = last_message["_id"], last_message["send_date"].isoformat()
 
-        if len(messages) < 3:
+        version = f"{chat_id}:{last_id}:{last_send_date}:{n_messages}:{AnalyzerRegistry.model_version}"
+        return hashlib.sha1(version.encode("utf-8")).hexdigest()
+
+    def make_state_version(self, chat_id, state: dict):
+        # Version of a precomputed report, it changes whenever the worker folds messages
+        version = (
+            f"{chat_id}:state:{state['last_send_date'].isoformat()}:"
+            f"{state.get('last_message_id')}:{state['client_message_count']}:"
+            f"{AnalyzerRegistry.model_version}"
+        )
+        return hashlib.sha1(version.encode("utf-8")).hexdigest()
+
+    @timed_stage("state_load")
+    def get_precomputed_report(self, chat_id):
+        # Returns (version, coefficient), or None until the chat state holds a coefficient.
+        # A state the worker has not caught up with yet is not served either
+        state = self.report_repository.get_chat_state(chat_id)
+        if state is None or "coefficient" not in state:
+            return None
+        next_message = self.report_repository.get_next_client_message(
+            chat_id, state["last_send_date"], state.get("last_message_id")
+        )
+        return self.check_precomputed_report(chat_id, state, next_message)
+
+    def check_precomputed_report(self, chat_id, state: dict, next_message: dict):
+        # Only client messages change the coefficient, so the state is current while
+        # there are none after its checkpoint
+        if next_message is not None:
+            precomputed_reports.inc("stale")
+            return None
+        precomputed_reports.inc("current")
+        return self.make_state_version(chat_id, state), state["coefficient"]
+
+    @timed_stage("version")
+    def get_chat_version(self, chat_id):
+        last_message = self.report_repository.get_last_message(chat_id)
+        n_messages = self.report_repository.count_version_messages(chat_id)
+        return self.make_chat_version(chat_id, last_message, n_messages)
+
+    def check_chat_history(self, n_messages: int):
+        if n_messages < 3:
             raise VoidChatHistory(
                 "Chat não tem mensagens suficientes para uma análise de sentimento"
             )
-        return messages
-
-    def import_data(self, messages: list):
-        order = 1
 
-        messages_dict = {
-            "id": [],
-            "text": [],
-            "source": [],
-            "send_date": [],
-            "order_in_chat": [],
-        }
-
-        for m in messages:
-            # Get message id
-            messages_dict["id"].append(m["_id"])
-
-            # Get message source
-            if m["is_out"]:
-                messages_dict["source"].append("A")
-                # Add order in chat sequence for Attendant:
-                messages_dict["order_in_chat"].append("NA")
-            else:
-                messages_dict["source"].append("C")
-                # Add order in chat sequence for Client:
-                messages_dict["order_in_chat"].append(order)
-                order += 1
-
-            # Get message text
-            messages_dict["text"].append(m["text"])
+    def get_chat_messages(self, chat_id: str):
+        messages = self.report_repository.get_chat_messages(chat_id)
+        messages = list(messages)
 
-            # Get message datetime
-            messages_dict["send_date"].append(m["timestamp"])
+        self.check_chat_history(len(messages))
+        return messages
 
-        messages_df = pd.DataFrame(data=messages_dict)
+    @timed_stage("import")
+    def import_data(self, messages, first_order: int = 1):
+        # Messages can be a list or a cursor, every field is read in a single pass
+        rows = list(map(itemgetter("_id", "is_out", "text", "timestamp"), messages))
+        ids, is_out, texts, timestamps = zip(*rows) if rows else ([], [], [], [])
+
+        is_client = ~np.array(is_out, dtype=bool)
+
+        # Order in chat sequence for Client, missing for Attendant
+        orders = np.cumsum(is_client, dtype=np.int32) + np.int32(first_order - 1)
+        order_in_chat = pd.arrays.IntegerArray(orders, mask=~is_client)
+
+        # Source is "A" for Attendant and "C" for Client
+        source = pd.Categorical.from_codes(is_client.astype(np.int8), categories=["A", "C"])
+
+        messages_df = pd.DataFrame(
+            {
+                "id": pd.Series(ids, dtype=object),
+                "text": pd.Series(texts, dtype=object),
+                "source": source,
+                "send_date": pd.to_datetime(pd.Series(timestamps, dtype=object)),
+                "order_in_chat": order_in_chat,
+            }
+        )
 
-        # Sort messages by send_date
-        messages_df.sort_values(by=["send_date"], inplace=True)
+        # Mongo already returns messages sorted by send_date, only sort when they are not
+        if not messages_df["send_date"].is_monotonic_increasing:
+            messages_df.sort_values(by=["send_date"], kind="stable", inplace=True)
 
         return messages_df
 
+    @timed_stage("import")
+    def import_client_data(self, messages: list):
+        # Client messages numbered by the aggregation pipeline, same shape as message_cleanup output
+        rows = list(map(itemgetter("_id", "text", "timestamp", "order_in_chat"), messages))
+        ids, texts, timestamps, orders = zip(*rows) if rows else ([], [], [], [])
+
+        client_messages_df = pd.DataFrame(
+            {
+                "id": pd.Series(ids, dtype=object),
+                "text": pd.Series(texts, dtype=object),
+                "source": pd.Categorical(["C"] * len(ids), categories=["A", "C"]),
+                "send_date": pd.to_datetime(pd.Series(timestamps, dtype=object)),
+                "order_in_chat": pd.array(orders, dtype="Int32"),
+            }
+        )
+
+        return client_messages_df
+
+    def get_client_messages_df(
+        self, chat_id: str, after=None, after_id=None, first_order: int = 1
+    ):
+        # Returns the client messages dataframe and the last fetched message
+        if client_messages_pipeline:
+            try:
+                with StageTimer("fetch"):
+                    messages = self.report_repository.get_client_messages(
+                        chat_id, after, after_id, first_order
+                    )
+                    messages = list(messages)
+            except OperationFailure:
+                # Servers without $setWindowFields use the regular query below
+                messages = None
+
+            if messages is not None:
+                # Attendant messages are not fetched, so the first report counts the chat apart
+                n_chat_messages = None
+                if after is None:
+                    with StageTimer("count"):
+                        n_chat_messages = self.report_repository.count_chat_messages(
+                            chat_id, limit=3
+                        )
+                return self.make_client_messages_df(messages, n_chat_messages)
+
+        with StageTimer("fetch"):
+            messages = self.report_repository.get_chat_messages(chat_id, after, after_id)
+            messages = list(messages)
+        return self.make_chat_messages_df(messages, after, first_order)
+
+    def make_client_messages_df(self, messages: list, n_chat_messages: int = None):
+        # Client messages fetched by the pipeline, n_chat_messages is only counted for
+        # the first report of a chat
+        chat_messages.observe("fetched", len(messages))
+        if n_chat_messages is not None:
+            self.check_chat_history(n_chat_messages)
+
+        last_message = messages[-1] if messages else None
+        return self.import_client_data(messages), last_message
+
+    def make_chat_messages_df(self, messages: list, after=None, first_order: int = 1):
+        # All messages fetched by the regular query, attendant ones are dropped here
+        chat_messages.observe("fetched", len(messages))
+        if after is None:
+            self.check_chat_history(len(messages))
+
+        last_message = messages[-1] if messages else None
+        messages_df = self.import_data(messages, first_order=first_order)
+        return self.message_cleanup(messages_df), last_message
+
+    @timed_stage("cleanup")
     def message_cleanup(self, messages_df):
         cleaned_messages_df = messages_df[messages_df["source"] == "C"]
         cleaned_messages_df.reset_index(drop=True, inplace=True)
@@ -112,94 +234,334 @@ class ReportService:
         return sent_output
 
     def split_message_sections(self, message: str):
-        emoji_list = emoji.emoji_list(message)
-        emojis = ""
-        text = message
+        # Single scan over the message, same output as removing each emoji_list match
+        return split_emoji_sections(message)
 
-        # Case where the message does not have emojis
-        if len(emoji_list) == 0:
-            return {"text": text, "emojis": emojis}
+    def get_message_compound(self, message: str) -> float:
+        return message_compound(message)
 
-        for e in emoji_list:
-            # Add emoji to emoji list
-            emojis += e["emoji"]
+    def extract_leia_sentiments(self, compounds: np.ndarray):
+        # Vectorized version of extract_leia_sentiment for a whole column of compounds
+        new_scores = (compounds + 1) / 2
 
-            # Remove emoji from text
-            text = text.replace(e["emoji"], "")
+        # Conditions are checked in the same order as extract_leia_sentiment
+        labels = np.select(
+            [compounds == 0, compounds > 0.2, compounds > 0, compounds >= -0.2],
+            [0, 2, 1, -1],
+            default=-2,
+        )
 
-        return {"text": text, "emojis": emojis}
+        return new_scores, labels
 
-    def get_message_compound(self, message: str) -> float:
-        leia = LeiaAnalyzer()
-        vader = EmojiAnalyzer()
+    def classify_texts(self, texts: pd.Series) -> np.ndarray:
+        # Messages that only differ by whitespace get the same compound, so each
+        # distinct normalized text ("ok", "obrigado", "👍", ...) is scored only once
+        normalized_texts = [" ".join(text.split()) for text in texts]
+        codes, unique_texts = pd.factorize(pd.Series(normalized_texts, dtype=object))
+
+        # Very large chats are scored by a process pool, the GIL serializes the analyzers
+        if len(unique_texts) > self.process_pool_threshold:
+            unique_compounds = np.array(
+                score_messages_in_pool(list(unique_texts)), dtype=np.float64
+            )
+        else:
+            unique_compounds = np.fromiter(
+                (self.get_message_compound(text) for text in unique_texts),
+                dtype=np.float64,
+                count=len(unique_texts),
+            )
 
-        split_message = self.split_message_sections(message)
+        return unique_compounds[codes]
 
-        # Get text message compound
-        text_compound = leia.polarity_scores(split_message["text"])["compound"]
+    def get_chat_compounds(self, messages_df: pd.DataFrame) -> np.ndarray:
+        keys = [
+            self.sentiment_cache.make_key(message_id, text)
+            for message_id, text in zip(messages_df["id"], messages_df["text"])
+        ]
+        cached = self.sentiment_cache.get_many(keys)
 
-        # Get emojis compound
-        emoji_compound = vader.polarity_scores(split_message["emojis"])["compound"]
+        compounds = np.array([cached.get(key, np.nan) for key in keys], dtype=np.float64)
 
-        # Emoji compound has a greater weight than text compound because it usually
-        # holds more sentiment that pure text
-        message_compound = round((text_compound + 2 * emoji_compound) / 3, 4)
+        # Only messages that were never scored go through the analyzers
+        missing = np.flatnonzero(np.isnan(compounds))
+        if len(missing) > 0:
+            compounds[missing] = self.classify_texts(messages_df["text"].iloc[missing])
+            self.sentiment_cache.set_many(
+                {keys[i]: float(compounds[i]) for i in missing}
+            )
 
-        return message_compound
+        return compounds
 
+    @timed_stage("classification")
     def chat_classification(self, messages_df: pd.DataFrame):
-        # Apply leia classifier
-        classified_df = messages_df.assign(
-            score=messages_df["text"].apply(lambda x: self.get_message_compound(x))
-        )
+        chat_messages.observe("client", len(messages_df))
+
+        # Apply leia classifier, reusing cached compounds of already scored messages
+        compounds = self.get_chat_compounds(messages_df)
 
         # Generate labels and normalized classification score
-        classified_df = classified_df.assign(
-            classification_score=classified_df["score"].apply(
-                lambda x: self.extract_leia_sentiment(x)["new_score"]
-            ),
-            classification_label=classified_df["score"].apply(
-                lambda x: self.extract_leia_sentiment(x)["label"]
-            ),
+        new_scores, labels = self.extract_leia_sentiments(compounds)
+        classified_df = messages_df.assign(
+            classification_score=new_scores,
+            classification_label=labels,
         )
 
         # Remove unecessary columns
-        classified_df.drop(columns=["score", "source"], inplace=True)
+        classified_df.drop(columns=["source"], inplace=True)
 
         return classified_df
 
+    # Closed form of Σi² for i in 1..n_messages
+    def squared_order_sum(self, n_messages: int):
+        return n_messages * (n_messages + 1) * (2 * n_messages + 1) // 6
+
+    # Largest weight share Σi² (i ≤ n - K) / Σi² (i ≤ n) of the messages left out of a
+    # window of the last K client messages
+    def window_weight_share(self, n_messages: int, window: int):
+        return self.squared_order_sum(n_messages - window) / self.squared_order_sum(n_messages)
+
+    def recency_window(self, n_messages: int, tolerance: float):
+        # Exact and windowed coefficients differ by share·(mean of the left out labels -
+        # windowed coefficient), at most 4·share since labels are in [-2, 2]. The smallest
+        # window meeting the tolerance is found by bisection as the share only decreases
+        low, high = 1, n_messages
+        while low < high:
+            window = (low + high) // 2
+            if 4 * self.window_weight_share(n_messages, window) <= tolerance:
+                high = window
+            else:
+                low = window + 1
+        return low
+
     def calculate_weight(self, order: int, n_messages: int):
         if n_messages < 1:
             raise NoClientMessages("Não há mensagens de clientes no chat")
-        den = 0
-        for i in range(1, n_messages + 1):
-            den += i**2
-        w = (order**2) / den
+        w = (order**2) / self.squared_order_sum(n_messages)
 
         return w
 
+    # Function to compute every message weight and the weighted chat coefficient in one pass
+    def weighted_sentiment_kernel(self, orders: np.ndarray, labels: np.ndarray):
+        n_messages = len(orders)
+        if n_messages < 1:
+            raise NoClientMessages("Não há mensagens de clientes no chat")
+
+        weights = orders.astype(np.float64) ** 2 / self.squared_order_sum(n_messages)
+        coef = np.dot(labels, weights) / weights.sum()
+
+        return weights, float(coef)
+
     # Function to generate a dataframe with weighted messages:
+    @timed_stage("weighting")
     def generate_weighted_df(self, df: pd.DataFrame):
-        n_messages = df.shape[0]
-        df = df.assign(
-            message_weight=df.apply(
-                lambda x: self.calculate_weight(x["order_in_chat"], n_messages), axis=1
-            )
+        weights, _ = self.weighted_sentiment_kernel(
+            df["order_in_chat"].to_numpy(dtype=np.int64),
+            df["classification_label"].to_numpy(dtype=np.int64),
         )
+        df = df.assign(message_weight=weights)
 
         return df
 
     # Function to calculate chat sentiment based on message weights and classification score
+    @timed_stage("coefficient")
     def calculate_chat_sentiment_coef(self, df: pd.DataFrame):
-        num = 0
-        den = 0
-        for idx, row in df.iterrows():
-            num += row["classification_label"] * row["message_weight"]
-            den += row["message_weight"]
-        coef = num / den
+        weights = df["message_weight"].to_numpy(dtype=np.float64)
+        labels = df["classification_label"].to_numpy(dtype=np.float64)
+        coef = float(np.dot(labels, weights) / weights.sum())
         return coef
 
+    # Function to add new client messages to the chat's running weighted sums.
+    # Since weights are order²/Σi², the coefficient equals Σ(label·order²)/Σ(order²)
+    def fold_client_messages(self, state: dict, client_messages_df, last_message: dict):
+        classified_messages_df = self.chat_classification(client_messages_df)
+
+        with StageTimer("weighting"):
+            orders = classified_messages_df["order_in_chat"].to_numpy(dtype=np.int64)
+            labels = classified_messages_df["classification_label"].to_numpy(dtype=np.int64)
+
+            new_state = {
+                "last_send_date": last_message["send_date"],
+                "last_message_id": last_message["_id"],
+                "client_message_count": state["client_message_count"] + len(orders),
+                "weighted_label_sum": state["weighted_label_sum"]
+                + int(np.dot(labels, orders**2)),
+                "weight_sum": state["weight_sum"] + int(np.dot(orders, orders)),
+            }
+
+        # Stored with the sums so the precomputed report is a single read
+        if new_state["weight_sum"] > 0:
+            new_state["coefficient"] = new_state["weighted_label_sum"] / new_state["weight_sum"]
+        return new_state
+
+    def make_resume_state(self, state: dict):
+        # The state document may only hold the chat's sentiment snapshot so far
+        if state is None or "last_send_date" not in state:
+            state = {
+                "last_send_date": None,
+                "last_message_id": None,
+                "client_message_count": 0,
+                "weighted_label_sum": 0,
+                "weight_sum": 0,
+            }
+        return state
+
+    def make_state_coef(self, state: dict):
+        if state["client_message_count"] < 1:
+            raise NoClientMessages("Não há mensagens de clientes no chat")
+
+        with StageTimer("coefficient"):
+            coef = state["weighted_label_sum"] / state["weight_sum"]
+        return coef
+
+    # Function to calculate chat sentiment folding only messages newer than the stored chat state
+    def calculate_incremental_coef(self, chat_id: str):
+        with StageTimer("state_load"):
+            state = self.make_resume_state(self.report_repository.get_chat_state(chat_id))
+
+        # New client messages continue the order of the already processed ones. The
+        # checkpoint is the (send_date, _id) of the last processed message
+        client_messages_df, last_message = self.get_client_messages_df(
+            chat_id,
+            after=state["last_send_date"],
+            after_id=state.get("last_message_id"),
+            first_order=state["client_message_count"] + 1,
+        )
+
+        if last_message is not None:
+            new_state = self.fold_client_messages(state, client_messages_df, last_message)
+            with StageTimer("state_save"):
+                self.report_repository.save_chat_state(
+                    chat_id, new_state, state["last_send_date"], state.get("last_message_id")
+                )
+            state = new_state
+
+        return self.make_state_coef(state)
+
+    def score_recent_messages(self, recent_messages: list, n_messages: int):
+        # Recent messages come newest first, they keep their order in the whole chat
+        window = len(recent_messages)
+        messages = recent_messages[::-1]
+        for order, message in enumerate(messages, start=n_messages - window + 1):
+            message["order_in_chat"] = order
+
+        classified_messages_df = self.chat_classification(self.import_client_data(messages))
+        with StageTimer("weighting"):
+            _, coef = self.weighted_sentiment_kernel(
+                classified_messages_df["order_in_chat"].to_numpy(dtype=np.int64),
+                classified_messages_df["classification_label"].to_numpy(dtype=np.int64),
+            )
+
+        # With the windowed coefficient known the left out labels can deviate from it by
+        # at most 2 + |coef|, which gives the exact bound for this result
+        error_bound = self.window_weight_share(n_messages, window) * (2 + abs(coef))
+        return {
+            "coefficient": coef,
+            "error_bound": error_bound,
+            "scored_messages": window,
+            "client_messages": n_messages,
+        }
+
+    def count_client_messages(self, chat_id: str, state: dict = None):
+        newer = self.report_repository.count_client_messages(
+            chat_id, *self.make_count_checkpoint(state)
+        )
+        return self.make_client_message_count(state, newer)
+
+    def make_count_checkpoint(self, state: dict):
+        # The chat state already counts the client messages up to its checkpoint, only
+        # the newer ones are counted, over the send_date range of the index
+        if state is None or "client_message_count" not in state:
+            return ()
+        return state["last_send_date"], state.get("last_message_id")
+
+    def make_client_message_count(self, state: dict, newer: int):
+        if state is None or "client_message_count" not in state:
+            return newer
+        return state["client_message_count"] + newer
+
+    def check_recent_window(self, n_chat_messages: int, n_messages: int, tolerance: float):
+        self.check_chat_history(n_chat_messages)
+        if n_messages < 1:
+            raise NoClientMessages("Não há mensagens de clientes no chat")
+        return self.recency_window(n_messages, tolerance)
+
+    # Function to approximate chat sentiment from the most recent client messages only
+    def calculate_recent_coef(self, chat_id: str, tolerance: float):
+        with StageTimer("state_load"):
+            state = self.report_repository.get_chat_state(chat_id)
+
+        with StageTimer("count"):
+            n_chat_messages = self.report_repository.count_chat_messages(chat_id, limit=3)
+            n_messages = self.count_client_messages(chat_id, state)
+        window = self.check_recent_window(n_chat_messages, n_messages, tolerance)
+
+        with StageTimer("fetch"):
+            recent_messages = list(
+                self.report_repository.get_recent_client_messages(chat_id, window)
+            )
+        chat_messages.observe("fetched", len(recent_messages))
+
+        return self.score_recent_messages(recent_messages, n_messages)
+
+    # Function to calculate chat sentiment from an already fetched chat history
+    def calculate_chat_coef(self, messages: list):
+        self.check_chat_history(len(messages))
+
+        messages_df = self.import_data(messages)
+        client_messages_df = self.message_cleanup(messages_df)
+        classified_messages_df = self.chat_classification(client_messages_df)
+        weighted_df = self.generate_weighted_df(classified_messages_df)
+
+        coef = self.calculate_chat_sentiment_coef(weighted_df)
+        return coef
+
+    # Function to calculate the sentiment of many chats with one chat query and one message query.
+    # Errors are reported per chat instead of failing the whole batch
+    def get_batch_sentiment(self, chat_keys: list):
+        results = [{"account_id": a, "wa_chat_id": w} for a, w in chat_keys]
+
+        valid_keys = []
+        for result in results:
+            if ObjectId.is_valid(result["account_id"]):
+                valid_keys.append((result["account_id"], result["wa_chat_id"]))
+            else:
+                result["error"] = f"'{result['account_id']}' is not a valid ObjectId"
+                result["error_type"] = "InvalidId"
+
+        chat_ids = {}
+        if len(valid_keys) > 0:
+            for chat in self.report_repository.get_chat_ids(valid_keys):
+                chat_ids[(str(chat["account"]), chat["wa_chat_id"])] = chat["_id"]
+
+        chats_messages = {chat_id: [] for chat_id in chat_ids.values()}
+        if len(chats_messages) > 0:
+            for m in self.report_repository.get_chats_messages(list(chats_messages)):
+                chats_messages[m["chat"]].append(m)
+
+        for result in results:
+            if "error" in result:
+                continue
+
+            try:
+                account_id = str(ObjectId(result["account_id"]))
+                chat_id = chat_ids.get((account_id, result["wa_chat_id"]))
+                if chat_id is None:
+                    raise InexistantChat("Chat não encontrado")
+
+                coef = self.calculate_chat_coef(chats_messages[chat_id])
+            except (InexistantChat, VoidChatHistory, NoClientMessages) as err:
+                result["error"] = str(err)
+                result["error_type"] = type(err).__name__
+                continue
+
+            result["chat_id"] = str(chat_id)
+            result["coefficient"] = coef
+            result["label"] = self.generate_sentiment_label(coef)
+
+        return results
+
     # Function to generate the satisfaction label of the chat:
+    @timed_stage("label")
     def generate_sentiment_label(self, coef: float):
         label = ""
         if coef > 2 or coef < -2:
@@ -233,162 +595,18 @@ class ReportService:
         return chat_text
 
     def create_report(self, formated_chat: list, sentiment_coef: float):
-        # Create byte buffer to hold report information
-        pdf_buffer = BytesIO()
-        # Create document
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
-        # Report element list
-        elements = []
-        # Styles Class Instance
-        styles = getSampleStyleSheet()
-        # Creates a style for centered text
-        centered_style = PS(
-            name="CenteredStyle", parent=styles["Heading3"], alignment=1
-        )
+        # reportlab is only loaded by workers that actually build PDFs
+        from app.services.report_renderer import ReportRenderer
 
-        # TITLE
-        title = Paragraph("Relatório de Análise de Sentimento do Chat", styles["Title"])
-        elements.append(title)
-        elements.append(Spacer(1, 20))
-
-        # SECTION - "Method for Sentiment Analysis"
-        section_title = Paragraph(
-            "Método para Análise de Sentimento", styles["Heading1"]
-        )
-        elements.append(section_title)
-
-        # SUBSECTION - "Method Description"
-        subtitle = Paragraph("Descrição do Método", styles["Heading2"])
-        elements.append(subtitle)
-        elements.append(Spacer(1, 10))
-
-        # TEXT - "method description"
-        method_introduction = (
-            "O método para a obtenção da estimativa do sentimento de um cliente durante "
-            "uma interação com o atendimento consiste em :"
-        )
-
-        text = Paragraph(method_introduction, styles["Normal"])
-        elements.append(text)
-        elements.append(Spacer(1, 10))
-
-        method_list = [
-            "Análise do sentimento de todas as mensagens dos clientes",
-            "Cálculo do peso de cada mensagem",
-            "Cálculo da média do sentimento do chat completo",
-            "Interpretação do resultado da análise",
-        ]
-
-        numbered_list = ListFlowable(
-            [
-                Paragraph(f"{item}", styles["Normal"])
-                for i, item in enumerate(method_list, start=1)
-            ],
-            bulletType="bullet",
-            leftIndent=20,
-        )
-        elements.append(numbered_list)
-        elements.append(Spacer(1, 10))
-
-        entry_1 = (
-            "O primeiro passo consiste na aplicação do modelo de aprendizado de máquina treinado para a "
-            "classificação do sentimento do cliente em cada uma das mensagens enviadas para o atendente, gerando assim "
-            'um nível estimado de satisfação do cliente que varia entre "Satisfeito", "Levemente Satisfeito", "Neutro"'
-            ', "Levemente Insatisfeito" ou "Insatisfeito".'
-        )
-
-        text = Paragraph(entry_1, styles["Normal"])
-        elements.append(text)
-        elements.append(Spacer(1, 10))
-
-        entry_2 = (
-            "O que se segue é a transformação das classificações dos sentimentos individuais "
-            "expressos em cada uma das mensagens em pesos matemáticos que compõem o sentimento do cliente "
-            "durante todo o atendimento. Esses pesos são definidos seguindo-se a metodologia formulada internamente"
-            " pelo time de Inteligência Artificial da ChatGuru."
-        )
-
-        text = Paragraph(entry_2, styles["Normal"])
-        elements.append(text)
-        elements.append(Spacer(1, 10))
-
-        entry_3 = (
-            "Usando-se parâmetros obtidos do chat completo e do modelo de IA da ChatGuru, é calculado um "
-            "coeficiente numérico de satisfação do atendimento completo."
-        )
-
-        text = Paragraph(entry_3, styles["Normal"])
-        elements.append(text)
-        elements.append(Spacer(1, 10))
-
-        entry_4 = (
-            "Por fim, esse coeficiente de satisfação é interpretado em termos não-matemáticos para ser "
-            "apreciado pelo contratante do serviço."
-        )
-
-        text = Paragraph(entry_4, styles["Normal"])
-        elements.append(text)
-        elements.append(Spacer(1, 20))
-        elements.append(PageBreak())
-
-        # SECTION - "Sentiment Analysis"
-        section_title = Paragraph("Análise de Sentimento", styles["Heading1"])
-        elements.append(section_title)
-
-        # SUBSECTION - "Chat Presentation"
-        subtitle = Paragraph("Apresentação do Chat", styles["Heading2"])
-        elements.append(subtitle)
-        elements.append(Spacer(1, 10))
-
-        # TEXT - "chat content"
-        for line in formated_chat:
-            chat = Paragraph(line, styles["Normal"])
-            elements.append(chat)
-            elements.append(Spacer(1, 5))
-
-        # SUBSECTION - "Analysis result"
-        subtitle = Paragraph("Resultados da Análise", styles["Heading2"])
-        elements.append(subtitle)
-        elements.append(Spacer(1, 10))
-
-        # TEXT - "analysis result intro"
-        analysis_result = (
-            "Ao se aplicar o método já descrito neste relatório, o coeficiente de satisfação do usuário na "
-            "conversa apresentada como objeto de análise foi de:"
-        )
-        text = Paragraph(analysis_result, styles["Normal"])
-        elements.append(text)
-        elements.append(Spacer(1, 8))
-
-        # TEXT - "sentiment coefficient"
-        str_coef = str(round(sentiment_coef, 3))
-        text = f"coeficiente de satisfação = {str_coef}"
-        centered_text = Paragraph(text, centered_style)
-        elements.append(centered_text)
-        elements.append(Spacer(1, 10))
-
-        # TEXT - "result interpretation"
         sentiment_label = self.generate_sentiment_label(sentiment_coef)
-        interpretation = f"Dado o coeficiente de satisfação apresentado, podemos estimar que o cliente se sentiu:"
-        text = Paragraph(interpretation, styles["Normal"])
-        elements.append(text)
-
-        centered_text = Paragraph(sentiment_label, centered_style)
-        elements.append(centered_text)
-        elements.append(Spacer(1, 10))
-
-        # Build the rest of the report
-        doc.build(elements)
-
-        # Move buffer position to the beginning
-        pdf_buffer.seek(0)
-
-        return pdf_buffer
+        return ReportRenderer().render(formated_chat, sentiment_coef, sentiment_label)
 
     def update_file_to_s3(self, data, s3_bucket, s3_path):
-        s3 = boto3.client("s3")
+        # boto3 is only loaded by workers that actually upload PDFs
+        from app.services.s3_uploader import S3Uploader
+
         try:
-            s3.upload_fileobj(data, s3_bucket, s3_path)
+            S3Uploader().upload(data, s3_bucket, s3_path)
         except Exception:
             raise S3UploadError(
                 "Houve um erro ao fazer o upload do arquivo para o bucket S3"
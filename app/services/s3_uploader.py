@@ -0,0 +1,52 @@
+import configparser
+import os
+import threading
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+MB = 1024 * 1024
+
+# Endpoint is only set for S3 compatible stores such as MinIO
+endpoint_url = config.get("AWS", "ENDPOINT_URL", fallback="") or None
+max_pool_connections = config.getint("AWS", "MAX_POOL_CONNECTIONS", fallback=10)
+multipart_threshold = config.getint("AWS", "MULTIPART_THRESHOLD_MB", fallback=8) * MB
+multipart_part_size = config.getint("AWS", "MULTIPART_PART_SIZE_MB", fallback=8) * MB
+upload_concurrency = config.getint("AWS", "UPLOAD_CONCURRENCY", fallback=4)
+
+
+class S3Uploader:
+    # boto3 clients are thread-safe, so every thread of a process shares one client and
+    # its connection pool. The pid check gives forked workers their own client
+    _client = None
+    _client_pid = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_part_size,
+            max_concurrency=upload_concurrency,
+        )
+
+    @classmethod
+    def get_client(cls):
+        with cls._lock:
+            if cls._client is None or cls._client_pid != os.getpid():
+                cls._client = boto3.session.Session().client(
+                    "s3",
+                    endpoint_url=endpoint_url,
+                    config=Config(max_pool_connections=max_pool_connections),
+                )
+                cls._client_pid = os.getpid()
+        return cls._client
+
+    def upload(self, data, s3_bucket: str, s3_path: str):
+        # Files above the threshold are streamed in parallel multipart chunks
+        self.get_client().upload_fileobj(
+            data, s3_bucket, s3_path, Config=self.transfer_config
+        )
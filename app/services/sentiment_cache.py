@@ -0,0 +1,98 @@
+import configparser
+import hashlib
+import threading
+
+from collections import OrderedDict
+from app.repositories.sentiment_cache_repository import SentimentCacheRepository
+from app.services.analyzer_registry import AnalyzerRegistry
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+lru_size = config.getint("SENTIMENT_CACHE", "LRU_SIZE", fallback=100000)
+
+
+class LRUCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            # Evict least recently used entries above the size bound
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SentimentCache:
+    # In-process LRU in front of the persistent message_sentiments collection
+    def __init__(self, repository=None, max_size: int = lru_size, memory: LRUCache = None):
+        self._repository = repository
+        self.memory = memory if memory is not None else LRUCache(max_size)
+
+    @property
+    def repository(self):
+        # The module-level cache is built at import, its repository (and the database
+        # client) only on the first lookup
+        if self._repository is None:
+            self._repository = SentimentCacheRepository()
+        return self._repository
+
+    def make_key(self, message_id, text: str):
+        text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return f"{message_id}:{text_hash}:{AnalyzerRegistry.model_version}"
+
+    def get_many(self, keys: list):
+        found = {}
+        missing = []
+
+        for key in keys:
+            compound = self.memory.get(key)
+            if compound is None:
+                missing.append(key)
+            else:
+                found[key] = compound
+
+        if len(missing) == 0:
+            return found
+
+        # Fall back to the persistent store and keep its hits in memory
+        stored = self.repository.get_compounds(missing)
+        for key, compound in stored.items():
+            self.memory.put(key, compound)
+        found.update(stored)
+
+        return found
+
+    def set_many(self, compounds: dict):
+        for key, compound in compounds.items():
+            self.memory.put(key, compound)
+        self.repository.save_compounds(compounds)
+
+
+sentiment_cache = SentimentCache()
+
+
+def get_sentiment_cache(client=None):
+    # Services built with their own client read and write the compounds through it,
+    # in front of the same process LRU
+    if client is None:
+        return sentiment_cache
+    return SentimentCache(SentimentCacheRepository(client), memory=sentiment_cache.memory)
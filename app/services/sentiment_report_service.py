@@ -0,0 +1,82 @@
+from app.services.report_service import ReportService
+from app.services.snapshot_service import SnapshotService
+from app.services.report_result_cache import report_result_cache
+from app.services.precompute_service import precompute_enabled
+from datetime import datetime as dt
+
+
+class SentimentReportService:
+    # The /report/ flow shared by the Flask and Quart controllers: result cache, chat
+    # version, precomputed or incremental coefficient and the daily snapshot. The
+    # controllers only parse the request and turn errors into responses
+    def __init__(self, client=None):
+        self.report_service = ReportService(client)
+        self.snapshot_service = SnapshotService(client)
+        self.result_cache = report_result_cache
+        self.precompute_enabled = precompute_enabled
+
+    def get_chat_id(self, chat_key: tuple, cached_report: dict = None):
+        if cached_report is not None:
+            return cached_report["chat_id"]
+        return self.report_service.get_chat_id(*chat_key)
+
+    def get_chat_version(self, chat_id):
+        # Returns the version of the chat, used as the report's ETag, and the
+        # coefficient when the background worker already precomputed it
+        if self.precompute_enabled:
+            precomputed = self.report_service.get_precomputed_report(chat_id)
+            if precomputed is not None:
+                return precomputed
+        return self.report_service.get_chat_version(chat_id), None
+
+    def match_cached_report(self, cached_report: dict, version: str):
+        # Cached reports are only served while the chat keeps the same version
+        if cached_report is None or cached_report["version"] != version:
+            return None
+        return cached_report
+
+    def needs_recording(self, served_from: dict, today: dt):
+        # Reports served from the cache are added to the snapshot once a day
+        return served_from is None or served_from["snapshot_day"] != today
+
+    def record_report(self, chat_key: tuple, chat_id, report: dict, served_from: dict = None):
+        # served_from is the cache entry the report was served from, if any
+        today = self.snapshot_service.snapshot_day(dt.utcnow())
+        if not self.needs_recording(served_from, today):
+            return
+
+        self.snapshot_service.record_chat_sentiment(
+            chat_key[0], chat_id, report["coefficient"], today
+        )
+        self.result_cache.put(
+            chat_key, chat_id, report["version"], report["coefficient"], report["label"], today
+        )
+
+    def get_report(self, account_id: str, wa_chat_id: str):
+        chat_key = (account_id, wa_chat_id)
+        cached_report = self.result_cache.get(chat_key)
+
+        chat_id = self.get_chat_id(chat_key, cached_report)
+        version, coefficient = self.get_chat_version(chat_id)
+
+        served_from = self.match_cached_report(cached_report, version)
+        if served_from is not None:
+            coefficient, label = served_from["coefficient"], served_from["label"]
+        else:
+            # Only messages newer than the last report are processed
+            if coefficient is None:
+                coefficient = self.report_service.calculate_incremental_coef(chat_id)
+            label = self.report_service.generate_sentiment_label(coefficient)
+
+        report = {"version": version, "coefficient": coefficient, "label": label}
+        self.record_report(chat_key, chat_id, report, served_from)
+        return report
+
+    def get_recent_report(self, account_id: str, wa_chat_id: str, tolerance: float):
+        # Approximate coefficient of the most recent client messages, within the tolerance
+        chat_key = (account_id, wa_chat_id)
+        chat_id = self.get_chat_id(chat_key, self.result_cache.get(chat_key))
+
+        result = self.report_service.calculate_recent_coef(chat_id, tolerance)
+        result["label"] = self.report_service.generate_sentiment_label(result["coefficient"])
+        return result
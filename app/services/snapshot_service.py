@@ -0,0 +1,42 @@
+from app.repositories.snapshot_repository import SnapshotRepository
+from app.exceptions.errors import NoSentimentSnapshots
+from datetime import datetime as dt
+
+
+class SnapshotService:
+    def __init__(self, client=None):
+        self.snapshot_repository = SnapshotRepository(client)
+
+    def snapshot_day(self, date: dt):
+        # Snapshots are stored once per day, at midnight
+        return dt(date.year, date.month, date.day)
+
+    def record_chat_sentiment(self, account_id: str, chat_id: str, coef: float, date: dt = None):
+        day = self.snapshot_day(date or dt.utcnow())
+        previous = self.snapshot_repository.swap_chat_contribution(chat_id, day, coef)
+
+        # A chat counts once per day, with the last coefficient calculated that day
+        if previous.get("snapshot_day") == day:
+            coef_delta = coef - previous["snapshot_coef"]
+            count_delta = 0
+        else:
+            coef_delta = coef
+            count_delta = 1
+
+        self.snapshot_repository.add_to_day(account_id, day, coef_delta, count_delta)
+
+    def get_joint_sentiment(self, account_id: str, from_date: dt, to_date: dt):
+        # Range sums come from the difference of two cumulative snapshots
+        last_coef_sum, last_chat_count = self.snapshot_repository.get_cumulative(
+            account_id, self.snapshot_day(to_date)
+        )
+        first_coef_sum, first_chat_count = self.snapshot_repository.get_cumulative(
+            account_id, self.snapshot_day(from_date), inclusive=False
+        )
+
+        chat_count = last_chat_count - first_chat_count
+        if chat_count < 1:
+            raise NoSentimentSnapshots("Não há análises de sentimento no período informado")
+
+        coef = (last_coef_sum - first_coef_sum) / chat_count
+        return coef
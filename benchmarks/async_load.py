@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+def request_report(url: str):
+    start = time.perf_counter()
+    try:
+        with urlopen(url) as response:
+            status = response.status
+            response.read()
+    except HTTPError as err:
+        status = err.code
+    return status, time.perf_counter() - start
+
+
+def run(base_url: str, account_id: str, wa_chat_ids: list, concurrency: int, n_requests: int):
+    # Chats are requested round-robin so repeated reports only fold new messages, as in production
+    urls = [
+        f"{base_url}/report/?{urlencode({'account_id': account_id, 'wa_chat_id': w})}"
+        for w in wa_chat_ids
+    ]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(request_report, (urls[i % len(urls)] for i in range(n_requests)))
+        )
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status >= 500)
+    print(f"{base_url}: {n_requests} requests, {concurrency} concurrent")
+    print(f"  throughput: {n_requests / elapsed:8.1f} req/s")
+    print(f"  p50: {latencies[len(latencies) // 2] * 1000:8.1f} ms")
+    print(f"  p99: {latencies[int(len(latencies) * 0.99)] * 1000:8.1f} ms")
+    print(f"  5xx: {errors}")
+
+
+if __name__ == "__main__":
+    # Compare one sync worker (e.g. `gunicorn -w 1 --threads 8 app.app:app`) with one
+    # async worker (e.g. `hypercorn -w 1 app.asgi:app`) against the same database
+    arg_parser = argparse.ArgumentParser(description="Concurrent load test of /report/")
+    arg_parser.add_argument("base_url", nargs="+")
+    arg_parser.add_argument("--account-id", required=True)
+    arg_parser.add_argument("--wa-chat-id", action="append", required=True)
+    arg_parser.add_argument("--concurrency", type=int, default=64)
+    arg_parser.add_argument("--requests", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    for base_url in args.base_url:
+        run(base_url.rstrip("/"), args.account_id, args.wa_chat_id, args.concurrency, args.requests)
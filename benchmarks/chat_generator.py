@@ -0,0 +1,86 @@
+import random
+
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta
+
+CLIENT_PHRASES = [
+    "bom dia", "boa tarde", "boa noite", "oi", "olá, tudo bem?", "ok", "obrigado",
+    "obrigada pela ajuda", "valeu", "kkkkk", "quando chega meu pedido?",
+    "já faz uma semana que estou esperando", "o produto veio com defeito",
+    "não gostei do atendimento", "vocês são ótimos", "perfeito, muito obrigado",
+    "ainda não recebi o código de rastreio", "quero cancelar minha compra",
+    "a entrega atrasou de novo", "consegui resolver, obrigado", "péssimo serviço",
+    "pode me ajudar?", "aguardo retorno", "já paguei o boleto", "não funciona",
+    "adorei o produto", "que demora", "tá bom", "entendi", "sério isso?",
+]
+ATTENDANT_PHRASES = [
+    "Olá! Em que posso ajudar?", "Um momento, por favor.", "Vou verificar para você.",
+    "Poderia me informar o número do pedido?", "Seu pedido já foi enviado.",
+    "Pedimos desculpas pelo transtorno.", "O prazo de entrega é de até 5 dias úteis.",
+    "Já abrimos uma solicitação de troca.", "Posso ajudar em algo mais?",
+    "Obrigado pelo contato!", "O estorno será feito em até 2 faturas.",
+    "Encaminhei seu caso para o setor responsável.",
+]
+EMOJIS = [
+    "👍", "😀", "😡", "🙏", "❤️", "😂", "🥰", "😢", "😤", "👏", "🤔", "😍",
+    "👍🏽", "🙏🏻", "🇧🇷", "🤦‍♂️", "🤷‍♀️", "❤️‍🔥",
+]
+
+
+def object_id(rnd: random.Random):
+    return ObjectId("%024x" % rnd.getrandbits(96))
+
+
+def client_text(rnd: random.Random):
+    # Mostly short messages, some long complaints, a few emoji-only or emoji spam
+    kind = rnd.random()
+    if kind < 0.08:
+        return "".join(rnd.choice(EMOJIS) for _ in range(rnd.randint(1, 4)))
+    if kind < 0.1:
+        return rnd.choice(CLIENT_PHRASES) + " " + rnd.choice(EMOJIS) * rnd.randint(10, 80)
+
+    if kind < 0.8:
+        parts = [rnd.choice(CLIENT_PHRASES)]
+    else:
+        parts = [rnd.choice(CLIENT_PHRASES) for _ in range(rnd.randint(2, 8))]
+        parts.insert(rnd.randint(0, len(parts)), f"pedido {rnd.randint(10000, 99999)}")
+    if rnd.random() < 0.35:
+        parts.append("".join(rnd.choice(EMOJIS) for _ in range(rnd.randint(1, 3))))
+    return " ".join(parts)
+
+
+def generate_chat_documents(
+    n_messages: int,
+    seed: int = 42,
+    chat_id: ObjectId = None,
+    client_ratio: float = 0.55,
+    start: datetime = datetime(2024, 1, 1, 9),
+):
+    """Deterministic messages documents of one WhatsApp chat, sorted by send_date."""
+    rnd = random.Random(seed)
+    chat_id = chat_id or object_id(rnd)
+    send_date = start
+
+    documents = []
+    for _ in range(n_messages):
+        is_out = rnd.random() >= client_ratio
+        text = rnd.choice(ATTENDANT_PHRASES) if is_out else client_text(rnd)
+
+        # Replies come within minutes, conversations resume hours later
+        if rnd.random() < 0.95:
+            send_date += timedelta(seconds=rnd.randint(5, 600))
+        else:
+            send_date += timedelta(hours=rnd.randint(1, 48))
+
+        documents.append(
+            {
+                "_id": object_id(rnd),
+                "chat": chat_id,
+                "type": "chat",
+                "is_out": is_out,
+                "text": text,
+                "timestamp": send_date,
+                "send_date": send_date,
+            }
+        )
+    return documents
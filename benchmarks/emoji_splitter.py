@@ -0,0 +1,43 @@
+import random
+import timeit
+
+from app.services.emoji_splitter import split_emoji_sections, _replace_split
+
+WORDS = [
+    "ok", "obrigado", "bom dia", "boa tarde", "quando chega meu pedido",
+    "não gostei do atendimento", "perfeito", "aguardo retorno", "kkkkk", "valeu",
+]
+EMOJIS = ["👍", "😀", "😡", "🙏", "❤️", "👍🏽", "🇧🇷", "🤦‍♂️", "😂", "🥰"]
+
+
+def generate_messages(n_messages: int, seed: int = 42):
+    rnd = random.Random(seed)
+    messages = []
+    for _ in range(n_messages):
+        parts = [rnd.choice(WORDS) for _ in range(rnd.randint(0, 6))]
+        # Roughly half of the messages carry emojis, a few are emoji spam
+        if rnd.random() < 0.5:
+            parts += [rnd.choice(EMOJIS) for _ in range(rnd.randint(1, 3))]
+        if rnd.random() < 0.05:
+            parts.append(rnd.choice(EMOJIS) * rnd.randint(20, 200))
+        rnd.shuffle(parts)
+        messages.append(" ".join(parts))
+    return messages
+
+
+def run(n_messages: int = 5000, repeat: int = 5):
+    messages = generate_messages(n_messages)
+
+    # Both splitters must agree before their timings mean anything
+    for m in messages:
+        assert split_emoji_sections(m) == _replace_split(m), m
+
+    for name, splitter in [("emoji_list + replace", _replace_split), ("single scan", split_emoji_sections)]:
+        best = min(
+            timeit.repeat(lambda: [splitter(m) for m in messages], number=1, repeat=repeat)
+        )
+        print(f"{name:>22}: {best * 1e6 / n_messages:8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    run()
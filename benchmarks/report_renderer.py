@@ -0,0 +1,41 @@
+import timeit
+
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle as PS
+from app.services.report_renderer import ReportRenderer
+from benchmarks.emoji_splitter import generate_messages
+
+
+class UncachedReportRenderer(ReportRenderer):
+    # Previous behaviour: new stylesheet and method page on every report
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        styles.add(PS(name="CenteredStyle", parent=styles["Heading3"], alignment=1))
+        self.styles = styles
+
+    def static_elements(self):
+        return self.build_static_elements()
+
+
+def generate_chat(n_messages: int):
+    return [
+        f"[{'Atendente' if i % 2 else 'Cliente'}] (2024-01-01 10:{i % 60:02d}:00) {text}"
+        for i, text in enumerate(generate_messages(n_messages))
+    ]
+
+
+def run(sizes=(5, 50, 500), repeat: int = 10):
+    for n_messages in sizes:
+        formated_chat = generate_chat(n_messages)
+        for name, renderer_class in [("uncached", UncachedReportRenderer), ("cached", ReportRenderer)]:
+            best = min(
+                timeit.repeat(
+                    lambda: renderer_class().render(formated_chat, 0.5, "Levemente Satisfeito"),
+                    number=3,
+                    repeat=repeat,
+                )
+            ) / 3
+            print(f"{n_messages:>5} messages, {name:>8}: {1 / best:8.1f} reports/s")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,91 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "numpy", "pymongo", "emoji", "LeIA", "vaderSentiment", "reportlab", "boto3"]
+
+# Runs in a fresh interpreter, as a newly started worker would
+WORKER_STAGES = """
+import json, sys
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def loaded():
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+stages = []
+import app.app
+stages.append(("import app.app", rss_kb(), loaded()))
+
+from app.services.classification_pool import warm_up
+warm_up()
+stages.append(("classification warm-up", rss_kb(), loaded()))
+
+from app.services.report_service import ReportService
+from app.services.s3_uploader import S3Uploader
+from benchmarks.report_renderer import generate_chat
+ReportService().create_report(generate_chat(50), 0.5).close()
+stages.append(("first PDF", rss_kb(), loaded()))
+
+print(json.dumps(stages))
+"""
+
+
+def import_times(module: str = "app.app"):
+    # Cumulative microseconds per module, from the interpreter's -X importtime report
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def worker_rss():
+    output = subprocess.run(
+        [sys.executable, "-c", f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{WORKER_STAGES}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(repeat: int = 5):
+    # The best of a few runs, the first one also pays for cold .pyc and disk caches
+    best = {}
+    for _ in range(repeat):
+        for name, cumulative in import_times().items():
+            best[name] = min(best.get(name, cumulative), cumulative)
+
+    print(f"import app.app: {best['app.app'] / 1000:8.1f} ms")
+    for name in HEAVY_MODULES:
+        if name in best:
+            print(f"  {name:>16}: {best[name] / 1000:8.1f} ms")
+        else:
+            print(f"  {name:>16}: not imported")
+
+    print("worker RSS:")
+    for stage, rss, loaded in worker_rss():
+        print(f"  {stage:>22}: {rss / 1024:8.1f} MB  ({', '.join(loaded)})")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,98 @@
+import mongomock
+import pytest
+
+from app.database import connection
+from app.services.report_service import ReportService
+from app.services.sentiment_cache import sentiment_cache
+from benchmarks.chat_generator import generate_chat_documents
+
+# Per-stage benchmarks of the report pipeline, run apart from the tests:
+#   python -m pytest benchmarks/test_pipeline.py --benchmark-autosave
+#   python -m pytest benchmarks/test_pipeline.py --benchmark-compare --benchmark-compare-fail=min:10%
+# Stages and sizes are selected with -k, e.g. -k "chat_classification and 10000"
+
+SIZES = [10, 1000, 10000]
+ROUNDS = 5
+SEED = 42
+
+# Works offline: no config.ini, MongoDB or S3 is needed
+if not connection.config.has_section("MONGODB"):
+    connection.config.add_section("MONGODB")
+connection.config.set("MONGODB", "DB_NAME", "db_benchmark")
+
+
+def fresh_service(client):
+    # Messages and compounds are read from mongomock, compounds start from an empty cache
+    connection.get_db(client)["message_sentiments"].drop()
+    sentiment_cache.memory.clear()
+    return ReportService(client)
+
+
+def build_stages(client, chat_id, documents):
+    # Each stage is (setup, run): setup is not timed, stages that get a new service
+    # classify with an empty sentiment cache
+    service = fresh_service(client)
+    messages_df = service.import_data(documents)
+    client_messages_df = service.message_cleanup(messages_df)
+    classified_df = service.chat_classification(client_messages_df)
+    weighted_df = service.generate_weighted_df(classified_df)
+    coef = service.calculate_chat_sentiment_coef(weighted_df)
+
+    def new_service():
+        return fresh_service(client)
+
+    def same_service():
+        return service
+
+    return {
+        "fetch": (new_service, lambda s: s.get_client_messages_df(chat_id)),
+        "import_data": (same_service, lambda s: s.import_data(documents)),
+        "message_cleanup": (same_service, lambda s: s.message_cleanup(messages_df)),
+        "chat_classification": (
+            new_service,
+            lambda s: s.chat_classification(client_messages_df),
+        ),
+        "chat_classification_cached": (
+            same_service,
+            lambda s: s.chat_classification(client_messages_df),
+        ),
+        "generate_weighted_df": (
+            same_service,
+            lambda s: s.generate_weighted_df(classified_df),
+        ),
+        "calculate_chat_sentiment_coef": (
+            same_service,
+            lambda s: s.calculate_chat_sentiment_coef(weighted_df),
+        ),
+        "create_report": (
+            same_service,
+            lambda s: s.create_report(s.format_chat(documents), coef).close(),
+        ),
+    }
+
+
+STAGES = [
+    "fetch",
+    "import_data",
+    "message_cleanup",
+    "chat_classification",
+    "chat_classification_cached",
+    "generate_weighted_df",
+    "calculate_chat_sentiment_coef",
+    "create_report",
+]
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n_messages: f"{n_messages}")
+def stages(request):
+    client = mongomock.MongoClient()
+    documents = generate_chat_documents(request.param, seed=SEED)
+    client.db_benchmark.messages.insert_many([dict(d) for d in documents])
+    return build_stages(client, documents[0]["chat"], documents)
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_stage(benchmark, stages, stage):
+    setup, run = stages[stage]
+    benchmark.group = stage
+    benchmark.pedantic(run, setup=lambda: ((setup(),), {}), rounds=ROUNDS)
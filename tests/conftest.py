@@ -0,0 +1,194 @@
+import asyncio
+import os
+
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from app.database import connection
+from app.database.indexes import create_indexes
+from app.services.report_result_cache import report_result_cache
+from app.services.sentiment_cache import sentiment_cache
+from bson.objectid import ObjectId
+
+# Tests never touch the configured database, even when a config.ini is present
+if not connection.config.has_section("MONGODB"):
+    connection.config.read_dict({"MONGODB": {"CONNECTION_STRING": "mongodb://localhost"}})
+connection.config["MONGODB"]["DB_NAME"] = "chat_sentiment_test"
+
+# mongomock has no query planner nor $setWindowFields, some tests need a real server
+MONGODB_TEST_URI = os.environ.get("MONGODB_TEST_URI")
+
+ACCOUNT_ID = "65a000000000000000000001"
+
+# Chat "w1" of ACCOUNT_ID: (text, is_out), four client and two attendant messages
+CHAT_MESSAGES = [
+    ("bom dia", False),
+    ("Olá!", True),
+    ("adorei, obrigado", False),
+    ("ok", False),
+    ("Disponha!", True),
+    ("valeu 👍", False),
+]
+
+
+@pytest.fixture
+def mongo_client():
+    # The process caches would otherwise carry results over from earlier tests
+    report_result_cache.entries.clear()
+    sentiment_cache.memory.clear()
+    return mongomock.MongoClient()
+
+
+@pytest.fixture
+def process_client(mongo_client, monkeypatch):
+    # Routes and batch workers build their services without a client, so the mock is
+    # also the process-wide client. The default sentiment cache reconnects through it
+    monkeypatch.setattr(connection, "_client", mongo_client)
+    monkeypatch.setattr(connection, "_client_pid", os.getpid())
+    monkeypatch.setattr(sentiment_cache, "_repository", None)
+    return mongo_client
+
+
+class AsyncMockCursor:
+    # Motor cursors only run the query once awaited
+    def __init__(self, query):
+        self.query = query
+        self.modifiers = []
+
+    def sort(self, *args, **kwargs):
+        self.modifiers.append(("sort", args, kwargs))
+        return self
+
+    def limit(self, *args):
+        self.modifiers.append(("limit", args, {}))
+        return self
+
+    def batch_size(self, *args):
+        return self
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(0)
+        cursor = self.query()
+        for name, args, kwargs in self.modifiers:
+            cursor = getattr(cursor, name)(*args, **kwargs)
+        return list(cursor)[:length]
+
+
+class AsyncMockCollection:
+    # find and aggregate return cursors, any other call an awaitable
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncMockCursor(lambda: self.collection.find(*args, **kwargs))
+
+    def aggregate(self, pipeline, **kwargs):
+        return AsyncMockCursor(lambda: self.collection.aggregate(pipeline))
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def awaitable(*args, **kwargs):
+            await asyncio.sleep(0)
+            return method(*args, **kwargs)
+
+        return awaitable
+
+
+class AsyncMockDatabase:
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, name):
+        return AsyncMockCollection(self.db[name])
+
+
+class AsyncMockClient:
+    # Motor-like client over a mongomock client, so the async services and the sync
+    # services of a test share the same data
+    def __init__(self, client):
+        self.client = client
+
+    def __getitem__(self, name):
+        return AsyncMockDatabase(self.client[name])
+
+
+@pytest.fixture
+def async_mongo_client(mongo_client):
+    return AsyncMockClient(mongo_client)
+
+
+@pytest.fixture
+def async_process_client(process_client, async_mongo_client, monkeypatch):
+    # The ASGI routes build their services without a client as well
+    from app.database import async_connection
+
+    monkeypatch.setattr(
+        async_connection, "AsyncIOMotorClient", lambda *args, **kwargs: async_mongo_client
+    )
+    monkeypatch.setattr(async_connection, "_client", None)
+    return async_mongo_client
+
+
+@pytest.fixture(scope="module")
+def server_client():
+    from pymongo import MongoClient
+
+    client = MongoClient(MONGODB_TEST_URI, serverSelectionTimeoutMS=5000)
+    create_indexes(client)
+    yield client
+    client.drop_database(connection.get_db(client).name)
+    client.close()
+
+
+@pytest.fixture
+def client(process_client, tmp_path, monkeypatch):
+    # Flask test client. The app sets up its PDF job store in the working directory
+    monkeypatch.chdir(tmp_path)
+    from app.app import create_app
+
+    return create_app().test_client()
+
+
+@pytest.fixture
+def db(mongo_client):
+    return connection.get_db(mongo_client)
+
+
+@pytest.fixture
+def report_service(mongo_client):
+    from app.services.report_service import ReportService
+
+    return ReportService(mongo_client)
+
+
+@pytest.fixture
+def make_message():
+    start = datetime(2024, 1, 1, 9)
+
+    def make_message(chat_id, text, is_out=False, minute=0, **fields):
+        send_date = start + timedelta(minutes=minute)
+        return {
+            "_id": ObjectId(),
+            "chat": chat_id,
+            "type": "chat",
+            "is_out": is_out,
+            "text": text,
+            "timestamp": send_date,
+            "send_date": send_date,
+            **fields,
+        }
+
+    return make_message
+
+
+@pytest.fixture
+def chat_id(db, make_message):
+    chat_id = db.chats.insert_one({"account": ObjectId(ACCOUNT_ID), "wa_chat_id": "w1"}).inserted_id
+    db.messages.insert_many(
+        make_message(chat_id, text, is_out, minute=i)
+        for i, (text, is_out) in enumerate(CHAT_MESSAGES)
+    )
+    return chat_id
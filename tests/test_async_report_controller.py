@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("quart")
+
+from app.services import profiling
+from app.services.async_sentiment_report_service import AsyncSentimentReportService
+from app.services.profiling import PROFILE_HEADER
+from conftest import ACCOUNT_ID
+
+
+@pytest.fixture
+def asgi_client(async_process_client, tmp_path, monkeypatch):
+    # The app sets up its PDF job store in the working directory
+    monkeypatch.chdir(tmp_path)
+    from app.asgi import create_asgi_app
+
+    return create_asgi_app().test_client()
+
+
+def request(asgi_client, method, path, **kwargs):
+    async def send():
+        response = await getattr(asgi_client, method)(path, **kwargs)
+        return response, await response.get_data()
+
+    return asyncio.run(send())
+
+
+def report_url(**params):
+    return "/report/?" + "&".join(f"{key}={value}" for key, value in params.items())
+
+
+def test_report_is_revalidated_with_its_etag(asgi_client, chat_id):
+    response, data = request(asgi_client, "get", report_url(account_id=ACCOUNT_ID, wa_chat_id="w1"))
+    assert response.status_code == 200
+    assert b"Satisfeito" in data
+
+    etag = response.headers["ETag"]
+    response, _ = request(
+        asgi_client,
+        "get",
+        report_url(account_id=ACCOUNT_ID, wa_chat_id="w1"),
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_recent_report_is_json(asgi_client, chat_id):
+    response, data = request(
+        asgi_client, "get", report_url(account_id=ACCOUNT_ID, wa_chat_id="w1", tolerance=0.5)
+    )
+
+    assert response.status_code == 200
+    assert json.loads(data)["client_messages"] == 4
+
+
+@pytest.mark.parametrize(
+    "params, status_code",
+    [
+        ({"account_id": ACCOUNT_ID}, 400),
+        ({"account_id": ACCOUNT_ID, "wa_chat_id": "w1", "tolerance": "0"}, 400),
+        ({"account_id": "not-an-id", "wa_chat_id": "w1"}, 400),
+        ({"account_id": ACCOUNT_ID, "wa_chat_id": "missing"}, 404),
+    ],
+)
+def test_report_errors(asgi_client, chat_id, params, status_code):
+    response, _ = request(asgi_client, "get", report_url(**params))
+
+    assert response.status_code == status_code
+
+
+def test_batch_report(asgi_client, chat_id):
+    chats = [
+        {"account_id": ACCOUNT_ID, "wa_chat_id": "w1"},
+        {"account_id": ACCOUNT_ID, "wa_chat_id": "missing"},
+    ]
+    response, data = request(asgi_client, "post", "/report/batch", json={"chats": chats})
+
+    assert response.status_code == 200
+    first, second = json.loads(data)["results"]
+    assert first["chat_id"] == str(chat_id)
+    assert second["error_type"] == "InexistantChat"
+
+    response, _ = request(asgi_client, "post", "/report/batch", json={"chats": [{}]})
+    assert response.status_code == 400
+
+
+def test_joint_sentiment_bad_date(asgi_client):
+    url = f"/report/joint_sentiment?account_id={ACCOUNT_ID}&from_date=abc&to_date=2024-01-02"
+    response, _ = request(asgi_client, "get", url)
+
+    assert response.status_code == 400
+
+
+def test_profile_of_a_request_that_raises(asgi_client, chat_id, tmp_path, monkeypatch):
+    directory = tmp_path / "profiles"
+    monkeypatch.setattr(profiling, "profile_token", "secret")
+    monkeypatch.setattr(profiling, "profile_sample_rate", 0.0)
+    monkeypatch.setattr(profiling, "profile_directory", str(directory))
+
+    async def failing(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(AsyncSentimentReportService, "get_report", failing)
+
+    response, _ = request(
+        asgi_client,
+        "get",
+        report_url(account_id=ACCOUNT_ID, wa_chat_id="w1"),
+        headers={PROFILE_HEADER: "secret"},
+    )
+
+    assert response.status_code == 500
+    assert len(os.listdir(directory)) == 1
+    assert not profiling._profile_lock.locked()
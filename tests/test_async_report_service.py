@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("motor")
+
+from app.exceptions.errors import NoClientMessages, VoidChatHistory
+from app.services.async_report_service import AsyncReportService
+from app.services.async_sentiment_report_service import AsyncSentimentReportService
+from app.services.metrics import precomputed_reports
+from app.services.sentiment_report_service import SentimentReportService
+from bson.objectid import ObjectId
+from conftest import ACCOUNT_ID
+
+
+@pytest.fixture
+def async_report_service(async_mongo_client, mongo_client):
+    return AsyncReportService(async_mongo_client, mongo_client)
+
+
+def test_incremental_coef_matches_the_sync_service(
+    async_report_service, report_service, chat_id, db, make_message
+):
+    coef = asyncio.run(async_report_service.calculate_incremental_coef(chat_id))
+    state = db.chat_sentiment_states.find_one({"_id": chat_id})
+    assert state["client_message_count"] == 4
+
+    db.chat_sentiment_states.delete_one({"_id": chat_id})
+    assert coef == report_service.calculate_incremental_coef(chat_id)
+    assert db.chat_sentiment_states.find_one({"_id": chat_id}) == state
+
+    # Later messages are folded into the saved state
+    db.messages.insert_one(make_message(chat_id, "péssimo, não resolveu", minute=30))
+    assert asyncio.run(async_report_service.calculate_incremental_coef(chat_id)) < coef
+    assert db.chat_sentiment_states.find_one({"_id": chat_id})["client_message_count"] == 5
+
+
+def test_recent_coef_matches_the_sync_service(async_report_service, report_service, chat_id):
+    result = asyncio.run(async_report_service.calculate_recent_coef(chat_id, tolerance=0.5))
+
+    assert result == report_service.calculate_recent_coef(chat_id, tolerance=0.5)
+
+
+def test_client_count_reuses_the_chat_state(async_report_service, report_service, chat_id, db):
+    report_service.calculate_incremental_coef(chat_id)
+    state = db.chat_sentiment_states.find_one({"_id": chat_id})
+    db.messages.delete_many({"chat": chat_id})
+
+    # All messages are before the checkpoint, so the state's count is the whole count
+    assert asyncio.run(async_report_service.count_client_messages(chat_id, state)) == 4
+    assert asyncio.run(async_report_service.count_client_messages(chat_id)) == 0
+
+
+def test_precomputed_report(async_report_service, report_service, chat_id, db, make_message):
+    assert asyncio.run(async_report_service.get_precomputed_report(chat_id)) is None
+
+    coef = report_service.calculate_incremental_coef(chat_id)
+    version, coefficient = asyncio.run(async_report_service.get_precomputed_report(chat_id))
+    assert (version, coefficient) == report_service.get_precomputed_report(chat_id)
+    assert coefficient == coef
+
+    stale_reports = precomputed_reports._values.get("stale", 0)
+    db.messages.insert_one(make_message(chat_id, "péssimo, não resolveu", minute=30))
+    assert asyncio.run(async_report_service.get_precomputed_report(chat_id)) is None
+    assert precomputed_reports._values["stale"] == stale_reports + 1
+
+
+def test_chat_errors(async_report_service, db, make_message):
+    chat_id = ObjectId()
+    db.messages.insert_many(make_message(chat_id, "Olá!", True, minute=i) for i in range(3))
+
+    with pytest.raises(NoClientMessages):
+        asyncio.run(async_report_service.calculate_incremental_coef(chat_id))
+    with pytest.raises(NoClientMessages):
+        asyncio.run(async_report_service.calculate_recent_coef(chat_id, tolerance=0.5))
+
+    chat_id = ObjectId()
+    db.messages.insert_many(make_message(chat_id, "bom dia", minute=i) for i in range(2))
+    with pytest.raises(VoidChatHistory):
+        asyncio.run(async_report_service.calculate_incremental_coef(chat_id))
+    with pytest.raises(VoidChatHistory):
+        asyncio.run(async_report_service.calculate_recent_coef(chat_id, tolerance=0.5))
+
+
+def test_report_matches_the_sync_service(async_mongo_client, mongo_client, chat_id, db):
+    service = AsyncSentimentReportService(async_mongo_client, mongo_client)
+
+    report = asyncio.run(service.get_report(ACCOUNT_ID, "w1"))
+    assert report == SentimentReportService(mongo_client).get_report(ACCOUNT_ID, "w1")
+    # The snapshot is only recorded once for the day
+    assert db.sentiment_snapshots.find_one()["cum_chat_count"] == 1
+
+    result = asyncio.run(service.get_recent_report(ACCOUNT_ID, "w1", tolerance=0.5))
+    assert result["client_messages"] == 4
+    assert result["label"] == service.report_service.generate_sentiment_label(
+        result["coefficient"]
+    )
@@ -0,0 +1,78 @@
+import pytest
+
+from bson.objectid import ObjectId
+from conftest import ACCOUNT_ID
+
+
+@pytest.fixture
+def chats(db, make_message, chat_id):
+    # w1 is the shared chat, "short" has too few messages and "attendant" no client ones
+    for wa_chat_id, messages in [
+        ("short", [("oi", False), ("Olá!", True)]),
+        ("attendant", [("Olá!", True), ("Tudo bem?", True), ("Posso ajudar?", True)]),
+    ]:
+        other_chat_id = db.chats.insert_one(
+            {"account": ObjectId(ACCOUNT_ID), "wa_chat_id": wa_chat_id}
+        ).inserted_id
+        db.messages.insert_many(
+            make_message(other_chat_id, text, is_out, minute=i)
+            for i, (text, is_out) in enumerate(messages)
+        )
+    return chat_id
+
+
+def test_each_chat_gets_its_own_result(report_service, chats):
+    results = report_service.get_batch_sentiment(
+        [
+            (ACCOUNT_ID, "w1"),
+            ("not-an-id", "w1"),
+            (ACCOUNT_ID, "missing"),
+            (ACCOUNT_ID, "short"),
+            (ACCOUNT_ID, "attendant"),
+        ]
+    )
+
+    assert [result.get("error_type") for result in results] == [
+        None,
+        "InvalidId",
+        "InexistantChat",
+        "VoidChatHistory",
+        "NoClientMessages",
+    ]
+    assert results[0]["chat_id"] == str(chats)
+    assert results[0]["label"] == report_service.generate_sentiment_label(
+        results[0]["coefficient"]
+    )
+    assert all("coefficient" not in result for result in results[1:])
+
+
+def test_batch_matches_single_chat_reports(report_service, chats):
+    [result] = report_service.get_batch_sentiment([(ACCOUNT_ID, "w1")])
+
+    messages = report_service.get_chat_messages(chats)
+    assert result["coefficient"] == report_service.calculate_chat_coef(messages)
+
+
+def test_duplicated_chat_is_reported_twice(report_service, chats):
+    first, second = report_service.get_batch_sentiment([(ACCOUNT_ID, "w1"), (ACCOUNT_ID, "w1")])
+
+    assert first == second
+    assert "coefficient" in first
+
+
+def test_messages_are_fetched_once(report_service, chats, monkeypatch):
+    fetches = []
+    get_chats_messages = report_service.report_repository.get_chats_messages
+
+    def counting(chat_ids):
+        fetches.append(chat_ids)
+        return get_chats_messages(chat_ids)
+
+    monkeypatch.setattr(report_service.report_repository, "get_chats_messages", counting)
+    report_service.get_batch_sentiment([(ACCOUNT_ID, "w1"), (ACCOUNT_ID, "short")])
+
+    assert len(fetches) == 1 and len(fetches[0]) == 2
+
+
+def test_empty_batch(report_service):
+    assert report_service.get_batch_sentiment([]) == []
@@ -0,0 +1,94 @@
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from app.services import batch_scoring_service
+from app.services.batch_scoring_service import (
+    BatchScoringService,
+    MongoResultWriter,
+    ParquetResultWriter,
+)
+from bson.objectid import ObjectId
+from conftest import ACCOUNT_ID
+
+
+class InlinePool(ThreadPoolExecutor):
+    # Chunks are scored in a thread of the test process, against the mocked client
+    def __init__(self, max_workers, mp_context, initializer):
+        super().__init__(max_workers=1, initializer=initializer)
+
+
+@pytest.fixture(autouse=True)
+def inline_pool(process_client, monkeypatch):
+    monkeypatch.setattr(batch_scoring_service, "ProcessPoolExecutor", InlinePool)
+
+
+@pytest.fixture
+def chat_ids(db, make_message):
+    chat_ids = []
+    for i, n_messages in enumerate([4, 4, 2]):
+        chat_id = db.chats.insert_one(
+            {"account": ObjectId(ACCOUNT_ID), "wa_chat_id": f"w{i}"}
+        ).inserted_id
+        db.messages.insert_many(
+            make_message(chat_id, "adorei, obrigado", minute=minute)
+            for minute in range(n_messages)
+        )
+        chat_ids.append(chat_id)
+    return chat_ids
+
+
+def score(writer, restart=False):
+    return BatchScoringService(
+        ACCOUNT_ID, "r1", writer, workers=1, chunk_size=2, flush_size=2
+    ).score_account(restart)
+
+
+def test_chat_scored_after_failing_keeps_no_error(mongo_client, db, chat_ids, make_message):
+    writer = MongoResultWriter("r1", ACCOUNT_ID, mongo_client)
+    assert score(writer)["failed"] == 1
+
+    db.messages.insert_one(make_message(chat_ids[2], "ótimo", minute=10))
+    summary = score(writer, restart=True)
+    assert (summary["scored"], summary["failed"]) == (3, 0)
+
+    result = db.chat_sentiment_results.find_one({"_id": {"run": "r1", "chat": chat_ids[2]}})
+    assert "coefficient" in result
+    assert "error" not in result and "error_type" not in result
+
+
+def test_restart_drops_results_of_deleted_chats(mongo_client, db, chat_ids):
+    writer = MongoResultWriter("r1", ACCOUNT_ID, mongo_client)
+    score(writer)
+
+    db.chats.delete_one({"_id": chat_ids[0]})
+    score(writer, restart=True)
+
+    results = db.chat_sentiment_results.find({"_id.run": "r1"})
+    assert sorted(r["chat_id"] for r in results) == chat_ids[1:]
+
+
+def test_restart_removes_parquet_parts_of_the_earlier_run(db, chat_ids, tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = ParquetResultWriter(str(tmp_path))
+    score(writer)
+    assert len(os.listdir(tmp_path)) == 2
+
+    # The first part of the restarted run now starts at the second chat
+    db.chats.delete_one({"_id": chat_ids[0]})
+    score(writer, restart=True)
+
+    df = pd.read_parquet(tmp_path)
+    assert sorted(df["chat_id"]) == sorted(str(chat_id) for chat_id in chat_ids[1:])
+
+
+def test_parquet_clear_only_removes_part_files(tmp_path):
+    for name in ["part-a.parquet", "part-b.parquet", "notes.txt"]:
+        (tmp_path / name).write_text("")
+
+    ParquetResultWriter(str(tmp_path)).clear()
+
+    assert os.listdir(tmp_path) == ["notes.txt"]
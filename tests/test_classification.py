@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bson.objectid import ObjectId
+
+
+# Row by row implementation the batched classification replaced
+def legacy_chat_classification(report_service, messages_df: pd.DataFrame):
+    classified_df = messages_df.assign(
+        score=messages_df["text"].apply(lambda x: report_service.get_message_compound(x))
+    )
+    classified_df = classified_df.assign(
+        classification_score=classified_df["score"].apply(
+            lambda x: report_service.extract_leia_sentiment(x)["new_score"]
+        ),
+        classification_label=classified_df["score"].apply(
+            lambda x: report_service.extract_leia_sentiment(x)["label"]
+        ),
+    )
+    classified_df.drop(columns=["score", "source"], inplace=True)
+    return classified_df
+
+
+TEXTS = [
+    "ok",
+    "ok ",
+    "  ok",
+    "obrigado, adorei o atendimento",
+    "obrigado,  adorei o\tatendimento",
+    "obrigado, adorei o atendimento\n",
+    "péssimo serviço, não resolveram nada",
+    "👍",
+    " 👍 ",
+    "😡😡 que demora",
+    "😡😡  que demora",
+    "bom dia",
+    "",
+]
+
+
+@pytest.fixture
+def client_messages_df(report_service, make_message):
+    chat_id = ObjectId()
+    messages = [make_message(chat_id, text, minute=i) for i, text in enumerate(TEXTS)]
+    return report_service.message_cleanup(report_service.import_data(messages))
+
+
+def test_batched_classification_matches_the_row_by_row_one(report_service, client_messages_df):
+    expected = legacy_chat_classification(report_service, client_messages_df)
+
+    pd.testing.assert_frame_equal(
+        report_service.chat_classification(client_messages_df), expected
+    )
+
+
+def test_whitespace_variants_are_scored_once(report_service, client_messages_df, monkeypatch):
+    scored = []
+    get_message_compound = report_service.get_message_compound
+
+    def counting(text):
+        scored.append(text)
+        return get_message_compound(text)
+
+    monkeypatch.setattr(report_service, "get_message_compound", counting)
+    report_service.classify_texts(client_messages_df["text"])
+
+    assert len(scored) == len(set(" ".join(text.split()) for text in TEXTS))
+
+
+def test_labels_match_extract_leia_sentiment_at_the_boundaries(report_service):
+    rng = np.random.default_rng(5)
+    compounds = np.concatenate(
+        [
+            [0.0, -0.0, 0.2, -0.2, 1.0, -1.0],
+            np.nextafter([0.0, 0.0, 0.2, 0.2, -0.2, -0.2], [1, -1, 1, -1, 1, -1]),
+            rng.uniform(-1, 1, 200),
+        ]
+    )
+
+    new_scores, labels = report_service.extract_leia_sentiments(compounds)
+
+    expected = [report_service.extract_leia_sentiment(compound) for compound in compounds]
+    assert labels.tolist() == [e["label"] for e in expected]
+    assert new_scores.tolist() == [e["new_score"] for e in expected]
@@ -0,0 +1,107 @@
+import pandas as pd
+import pytest
+
+from app.exceptions.errors import VoidChatHistory
+from app.services import report_service as report_service_module
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+
+
+def emulate_client_messages_pipeline(messages: list, first_order: int = 1):
+    # What get_client_messages returns: client messages in message order, numbered
+    # from first_order, with the pipeline's projection
+    client_messages = [m for m in messages if not m["is_out"]]
+    return [
+        {
+            "_id": m["_id"],
+            "text": m["text"],
+            "timestamp": m["timestamp"],
+            "send_date": m["send_date"],
+            "order_in_chat": order,
+        }
+        for order, m in enumerate(client_messages, start=first_order)
+    ]
+
+
+@pytest.fixture
+def chat_id():
+    return ObjectId()
+
+
+@pytest.fixture
+def messages(db, make_message, chat_id):
+    texts = ["bom dia", "Olá!", "quando chega?", "Um momento.", "ok", "😡😡", "Enviado!"]
+    messages = [
+        make_message(chat_id, text, is_out=text[0].isupper(), minute=i)
+        for i, text in enumerate(texts)
+    ]
+    db.messages.insert_many(messages)
+    return messages
+
+
+@pytest.fixture
+def pipeline_enabled(monkeypatch):
+    monkeypatch.setattr(report_service_module, "client_messages_pipeline", True)
+
+
+@pytest.mark.parametrize("first_order", [1, 5])
+def test_import_client_data_matches_import_and_cleanup(report_service, messages, first_order):
+    expected = report_service.message_cleanup(
+        report_service.import_data(messages, first_order=first_order)
+    )
+    client_messages_df = report_service.import_client_data(
+        emulate_client_messages_pipeline(messages, first_order)
+    )
+
+    pd.testing.assert_frame_equal(client_messages_df, expected)
+
+
+def test_import_client_data_of_no_messages(report_service):
+    expected = report_service.message_cleanup(report_service.import_data([]))
+    pd.testing.assert_frame_equal(report_service.import_client_data([]), expected)
+
+
+def test_pipeline_fetch_matches_the_query_fetch(
+    report_service, messages, chat_id, pipeline_enabled, monkeypatch
+):
+    monkeypatch.setattr(
+        report_service.report_repository,
+        "get_client_messages",
+        lambda *args: emulate_client_messages_pipeline(messages),
+    )
+    client_messages_df, last_message = report_service.get_client_messages_df(chat_id)
+
+    expected_df = report_service.message_cleanup(report_service.import_data(messages))
+    pd.testing.assert_frame_equal(client_messages_df, expected_df)
+    assert last_message["_id"] == messages[-2]["_id"]
+
+
+def test_pipeline_fetch_checks_the_whole_chat_history(
+    report_service, db, make_message, pipeline_enabled, monkeypatch
+):
+    chat_id = ObjectId()
+    messages = [make_message(chat_id, "oi", minute=0), make_message(chat_id, "Olá", True, 1)]
+    db.messages.insert_many(messages)
+    monkeypatch.setattr(
+        report_service.report_repository,
+        "get_client_messages",
+        lambda *args: emulate_client_messages_pipeline(messages),
+    )
+
+    with pytest.raises(VoidChatHistory):
+        report_service.get_client_messages_df(chat_id)
+
+
+def test_servers_without_window_fields_fall_back_to_the_query(
+    report_service, messages, chat_id, pipeline_enabled, monkeypatch
+):
+    def unsupported(*args):
+        raise OperationFailure("Unrecognized pipeline stage name: '$setWindowFields'", 40324)
+
+    monkeypatch.setattr(report_service.report_repository, "get_client_messages", unsupported)
+    client_messages_df, last_message = report_service.get_client_messages_df(chat_id)
+
+    expected_df = report_service.message_cleanup(report_service.import_data(messages))
+    pd.testing.assert_frame_equal(client_messages_df, expected_df)
+    # The query fetch also returns attendant messages, the checkpoint is the last of all
+    assert last_message["_id"] == messages[-1]["_id"]
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from app.services import report_service as report_service_module
+from app.services.report_service import ReportService
+from bson.objectid import ObjectId
+from conftest import MONGODB_TEST_URI
+
+pytestmark = pytest.mark.skipif(
+    not MONGODB_TEST_URI, reason="set MONGODB_TEST_URI to run the aggregation pipeline"
+)
+
+
+@pytest.fixture
+def server_service(server_client):
+    return ReportService(server_client)
+
+
+@pytest.fixture
+def messages(server_service, make_message):
+    chat_id = ObjectId()
+    texts = [
+        ("bom dia", False),
+        ("Olá!", True),
+        ("quando chega?", False),
+        ("Um momento.", True),
+        ("ok", False),
+        ("😡😡", False),
+        ("Enviado!", True),
+        ("obrigado", False),
+    ]
+    messages = [
+        make_message(chat_id, text, is_out, minute=i) for i, (text, is_out) in enumerate(texts)
+    ]
+    # Sent in the same instant as "ok", after it in the _id order
+    messages.insert(5, make_message(chat_id, "valeu", minute=4))
+    server_service.report_repository.message_collection.insert_many(messages)
+    return messages
+
+
+def client_messages_df(report_service, monkeypatch, pipeline: bool, *args):
+    monkeypatch.setattr(report_service_module, "client_messages_pipeline", pipeline)
+    df, last_message = report_service.get_client_messages_df(*args)
+    return df, last_message["_id"]
+
+
+def test_pipeline_matches_the_query_path(server_service, messages, monkeypatch):
+    chat_id = messages[0]["chat"]
+
+    pipeline_df, last_id = client_messages_df(server_service, monkeypatch, True, chat_id)
+    query_df, _ = client_messages_df(server_service, monkeypatch, False, chat_id)
+
+    pd.testing.assert_frame_equal(pipeline_df, query_df)
+    assert pipeline_df["order_in_chat"].tolist() == list(range(1, 7))
+    # The pipeline only fetches client messages, its last one is the last client message
+    assert last_id == messages[-1]["_id"]
+
+
+@pytest.mark.parametrize("checkpoint", [2, 4, 5])
+def test_pipeline_matches_the_query_path_after_a_checkpoint(
+    server_service, messages, monkeypatch, checkpoint
+):
+    # Folded up to messages[checkpoint], the next client message gets the next order
+    chat_id = messages[0]["chat"]
+    folded = messages[: checkpoint + 1]
+    first_order = sum(1 for m in folded if not m.get("is_out")) + 1
+    args = (chat_id, folded[-1]["send_date"], folded[-1]["_id"], first_order)
+
+    pipeline_df, _ = client_messages_df(server_service, monkeypatch, True, *args)
+    query_df, _ = client_messages_df(server_service, monkeypatch, False, *args)
+
+    pd.testing.assert_frame_equal(pipeline_df, query_df)
+    assert pipeline_df["order_in_chat"].iloc[0] == first_order
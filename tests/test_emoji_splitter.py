@@ -0,0 +1,40 @@
+import random
+
+import emoji
+import pytest
+
+from app.services.emoji_splitter import _replace_split, split_emoji_sections
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "",
+        "bom dia",
+        "obrigado 👍👍",
+        "👍🏽 ok 🙏🏻",
+        "🤦‍♂️ sério isso?",
+        "❤️‍🔥❤️",
+        "🇧🇷 🇧🇷🇺🇸",
+        # 🇷🇺 also occurs across the adjacent 🇧🇷 and 🇺🇸 flags
+        "🇷🇺 x 🇧🇷🇺🇸",
+        "#️⃣ 1️⃣ #1",
+    ],
+)
+def test_same_split_as_the_replace_loop(message):
+    assert split_emoji_sections(message) == _replace_split(message)
+
+
+def test_random_messages_match_the_replace_loop():
+    emojis = list(emoji.EMOJI_DATA)
+    parts = [
+        "‍", "️", "🏽", "🏻", "⃣", "#", "1", "🇧", "🇷", "🇺", "🇸", "🇧🇷", "🇺🇸",
+        "🏴", "\U000e0067", "\U000e007f", " ", "ok", "obrigado", "❤", "👍", "👨", "💻",
+    ]
+    rnd = random.Random(0)
+    for _ in range(5000):
+        message = "".join(
+            rnd.choice(emojis) if rnd.random() < 0.4 else rnd.choice(parts)
+            for _ in range(rnd.randint(0, 8))
+        )
+        assert split_emoji_sections(message) == _replace_split(message), message
@@ -0,0 +1,61 @@
+import pytest
+
+from bson.objectid import ObjectId
+
+
+@pytest.fixture
+def chat_id():
+    return ObjectId()
+
+
+def full_coef(report_service, chat_id):
+    return report_service.calculate_chat_coef(report_service.get_chat_messages(chat_id))
+
+
+def test_incremental_matches_full_recomputation(report_service, db, make_message, chat_id):
+    texts = ["bom dia", "Olá!", "obrigado, adorei", "ok", "péssimo serviço", "valeu 👍"]
+    db.messages.insert_many(
+        make_message(chat_id, text, is_out=i % 2 == 1, minute=i) for i, text in enumerate(texts)
+    )
+    assert report_service.calculate_incremental_coef(chat_id) == pytest.approx(
+        full_coef(report_service, chat_id)
+    )
+
+    db.messages.insert_many(
+        [make_message(chat_id, "que demora", minute=10), make_message(chat_id, "😡", minute=11)]
+    )
+    assert report_service.calculate_incremental_coef(chat_id) == pytest.approx(
+        full_coef(report_service, chat_id)
+    )
+
+
+def test_message_sent_with_the_last_processed_one_is_folded(
+    report_service, db, make_message, chat_id
+):
+    db.messages.insert_many(
+        [
+            make_message(chat_id, "adorei", minute=0),
+            make_message(chat_id, "Olá!", is_out=True, minute=1),
+            make_message(chat_id, "ótimo, obrigado", minute=2),
+        ]
+    )
+    report_service.calculate_incremental_coef(chat_id)
+
+    # Same send_date as the last processed message, later in the _id order
+    db.messages.insert_one(make_message(chat_id, "péssimo, não gostei", minute=2))
+
+    coef = report_service.calculate_incremental_coef(chat_id)
+    assert coef == pytest.approx(full_coef(report_service, chat_id))
+    assert db.chat_sentiment_states.find_one({"_id": chat_id})["client_message_count"] == 3
+
+
+def test_state_is_not_overwritten_by_a_stale_fold(report_service, db, make_message, chat_id):
+    db.messages.insert_many(
+        make_message(chat_id, text, minute=i) for i, text in enumerate(["ok", "bom", "ruim"])
+    )
+    report_service.calculate_incremental_coef(chat_id)
+    state = db.chat_sentiment_states.find_one({"_id": chat_id})
+
+    # A fold that read no state loses against the one that already saved
+    report_service.report_repository.save_chat_state(chat_id, {"client_message_count": 99})
+    assert db.chat_sentiment_states.find_one({"_id": chat_id}) == state
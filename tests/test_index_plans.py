@@ -0,0 +1,21 @@
+import pytest
+
+from app.commands.index_commands import explain_report_queries, is_index_backed
+from app.database.indexes import missing_indexes
+from app.repositories.report_repository import ReportRepository
+from conftest import MONGODB_TEST_URI
+
+pytestmark = pytest.mark.skipif(
+    not MONGODB_TEST_URI, reason="set MONGODB_TEST_URI to explain against a MongoDB server"
+)
+
+
+def test_required_indexes_are_created(server_client):
+    assert missing_indexes(server_client) == []
+
+
+def test_report_queries_are_index_backed(server_client):
+    plans = explain_report_queries(ReportRepository(server_client))
+
+    not_backed = {query: stages for query, stages in plans.items() if not is_index_backed(stages)}
+    assert not_backed == {}
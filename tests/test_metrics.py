@@ -0,0 +1,47 @@
+import pytest
+
+from app.services import metrics
+from app.services import report_service as report_service_module
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    observed = []
+    monkeypatch.setattr(
+        metrics.stage_duration, "observe", lambda stage, value: observed.append(stage)
+    )
+    return observed
+
+
+def test_first_pipeline_report_observes_fetch_once(
+    report_service, db, chat_id, stages, monkeypatch
+):
+    monkeypatch.setattr(report_service_module, "client_messages_pipeline", True)
+    client_messages = [
+        {**m, "order_in_chat": order}
+        for order, m in enumerate(db.messages.find({"is_out": False}).sort("send_date"), 1)
+    ]
+    monkeypatch.setattr(
+        report_service.report_repository, "get_client_messages", lambda *args: client_messages
+    )
+
+    report_service.calculate_incremental_coef(chat_id)
+
+    assert stages.count("fetch") == 1
+    assert stages.count("count") == 1
+
+
+def test_recent_report_observes_fetch_once(report_service, chat_id, stages):
+    report_service.calculate_recent_coef(chat_id, tolerance=0.5)
+
+    assert stages.count("fetch") == 1
+    assert stages.count("count") == 1
+
+
+def test_metrics_endpoint(client):
+    metrics.stage_duration.observe("fetch", 0.002)
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type == metrics.METRICS_CONTENT_TYPE
+    assert 'report_stage_duration_seconds_count{stage="fetch"}' in response.get_data(as_text=True)
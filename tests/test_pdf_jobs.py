@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from app.repositories.pdf_job_repository import PdfJobRepository
+from app.services.pdf_job_service import init_pdf_jobs
+
+
+@pytest.fixture(autouse=True)
+def pdf_jobs_directory(tmp_path, monkeypatch):
+    # The store path is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def set_job_pid(job_id: str, pid):
+    PdfJobRepository().execute("UPDATE pdf_jobs SET pid = ? WHERE id = ?", (pid, job_id))
+
+
+def finished_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_repository_does_not_touch_the_store(pdf_jobs_directory):
+    PdfJobRepository()
+    assert not (pdf_jobs_directory / "pdf_jobs.sqlite3").exists()
+
+
+def test_startup_fails_the_jobs_of_dead_processes():
+    init_pdf_jobs()
+    pdf_job_repository = PdfJobRepository()
+    for job_id in ["dead", "restarted", "live", "done"]:
+        pdf_job_repository.create_job(job_id, "chat")
+    set_job_pid("dead", finished_pid())
+    set_job_pid("live", os.getppid())
+    pdf_job_repository.update_job("restarted", "running")
+    pdf_job_repository.update_job("done", "done", s3_key="report/chat/done.pdf")
+
+    # "restarted" has this process' pid, as if its previous process had the same one
+    assert sorted(init_pdf_jobs()) == ["dead", "restarted"]
+
+    statuses = {
+        job_id: pdf_job_repository.get_job(job_id)["status"]
+        for job_id in ["dead", "restarted", "live", "done"]
+    }
+    assert statuses == {
+        "dead": "failed",
+        "restarted": "failed",
+        "live": "queued",
+        "done": "done",
+    }
+    assert pdf_job_repository.get_job("dead")["error"]
+
+
+def test_startup_migrates_stores_without_pid(pdf_jobs_directory):
+    with sqlite3.connect(pdf_jobs_directory / "pdf_jobs.sqlite3") as connection:
+        connection.execute(
+            "CREATE TABLE pdf_jobs (id TEXT PRIMARY KEY, chat_id TEXT NOT NULL, "
+            "status TEXT NOT NULL, s3_key TEXT, error TEXT, created_at TEXT NOT NULL, "
+            "updated_at TEXT NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO pdf_jobs VALUES ('old', 'chat', 'running', NULL, NULL, 'x', 'x')"
+        )
+
+    assert init_pdf_jobs() == ["old"]
+    assert PdfJobRepository().get_job("old")["status"] == "failed"
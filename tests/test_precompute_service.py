@@ -0,0 +1,199 @@
+import pytest
+
+from app.services.precompute_service import (
+    CHANGE_STREAM_CHECKPOINT,
+    CHANGE_STREAM_HISTORY_LOST,
+    CHANGE_STREAM_NOT_SUPPORTED,
+    POLLING_CHECKPOINT,
+    PrecomputeService,
+)
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+
+
+@pytest.fixture
+def precompute_service(mongo_client, monkeypatch):
+    precompute_service = PrecomputeService(mongo_client)
+    # A single pass: the wait between polls stops the worker instead
+    monkeypatch.setattr(
+        precompute_service.stopped, "wait", lambda timeout: precompute_service.stop()
+    )
+    return precompute_service
+
+
+@pytest.fixture
+def refreshed(precompute_service, monkeypatch):
+    # Chats of every refresh, still folded by the real refresh_chats
+    batches = []
+    refresh_chats = precompute_service.refresh_chats
+
+    def recording(chat_ids):
+        batches.append(set(chat_ids))
+        return refresh_chats(chat_ids)
+
+    monkeypatch.setattr(precompute_service, "refresh_chats", recording)
+    return batches
+
+
+@pytest.fixture
+def short_chat_id(db, make_message):
+    chat_id = ObjectId()
+    db.messages.insert_many(
+        [make_message(chat_id, "oi"), make_message(chat_id, "tudo bem?", minute=1)]
+    )
+    return chat_id
+
+
+def run_again(precompute_service):
+    precompute_service.stopped.clear()
+    precompute_service.run_polling()
+
+
+def test_polling_folds_new_chats_and_saves_the_checkpoint(
+    precompute_service, refreshed, db, chat_id, short_chat_id
+):
+    precompute_service.run_polling()
+
+    assert refreshed == [{chat_id, short_chat_id}]
+    assert "coefficient" in db.chat_sentiment_states.find_one({"_id": chat_id})
+    last_message = db.messages.find_one({"is_out": False}, sort=[("_id", -1)])
+    assert precompute_service.precompute_repository.get_checkpoint(POLLING_CHECKPOINT) == (
+        last_message["_id"]
+    )
+
+
+def test_polling_resumes_after_the_checkpoint(
+    precompute_service, refreshed, db, make_message, chat_id, short_chat_id
+):
+    precompute_service.run_polling()
+    state = db.chat_sentiment_states.find_one({"_id": chat_id})
+
+    message = make_message(chat_id, "péssimo, não resolveu", minute=30)
+    db.messages.insert_one(message)
+    run_again(precompute_service)
+
+    assert refreshed[1] == {chat_id}
+    assert db.chat_sentiment_states.find_one({"_id": chat_id})["coefficient"] < state["coefficient"]
+    assert precompute_service.precompute_repository.get_checkpoint(POLLING_CHECKPOINT) == (
+        message["_id"]
+    )
+
+    # Nothing new, nothing refreshed
+    run_again(precompute_service)
+    assert len(refreshed) == 2
+
+
+def test_attendant_messages_do_not_trigger_a_refresh(
+    precompute_service, refreshed, db, make_message, chat_id
+):
+    precompute_service.run_polling()
+    db.messages.insert_one(make_message(chat_id, "Disponha!", is_out=True, minute=30))
+
+    run_again(precompute_service)
+
+    assert len(refreshed) == 1
+
+
+def test_chats_too_short_for_a_report_are_skipped(
+    precompute_service, db, make_message, chat_id, short_chat_id
+):
+    attendant_chat_id = ObjectId()
+    db.messages.insert_many(
+        make_message(attendant_chat_id, text, is_out=True, minute=i)
+        for i, text in enumerate(["Olá!", "Tudo bem?", "Posso ajudar?"])
+    )
+
+    refreshed = precompute_service.refresh_chats([short_chat_id, attendant_chat_id, chat_id])
+
+    assert refreshed == 1
+    assert db.chat_sentiment_states.find_one({"_id": short_chat_id}) is None
+
+
+class FakeChangeStream:
+    # Yields the given changes once, then stops the worker
+    def __init__(self, precompute_service, changes: list, resume_token):
+        self.precompute_service = precompute_service
+        self.changes = list(changes)
+        self.resume_token = resume_token
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def try_next(self):
+        if self.changes:
+            return self.changes.pop(0)
+        self.precompute_service.stop()
+        return None
+
+
+def test_change_stream_refreshes_batches_and_saves_the_resume_token(
+    precompute_service, refreshed, monkeypatch, chat_id
+):
+    changes = [{"fullDocument": {"chat": chat_id}}] * 3
+    monkeypatch.setattr(
+        precompute_service.precompute_repository,
+        "watch_messages",
+        lambda resume_token, max_await_ms: FakeChangeStream(
+            precompute_service, changes, {"_data": "token-1"}
+        ),
+    )
+
+    precompute_service.run_change_stream()
+
+    # A busy chat is refreshed once per batch
+    assert refreshed == [{chat_id}]
+    assert precompute_service.precompute_repository.get_checkpoint(CHANGE_STREAM_CHECKPOINT) == {
+        "_data": "token-1"
+    }
+
+
+def test_lost_resume_token_watches_from_now(precompute_service, monkeypatch):
+    precompute_service.precompute_repository.save_checkpoint(
+        CHANGE_STREAM_CHECKPOINT, {"_data": "old"}
+    )
+    watched = []
+
+    def watch_messages(resume_token, max_await_ms):
+        watched.append(resume_token)
+        if resume_token is not None:
+            raise OperationFailure("resume token not found", code=CHANGE_STREAM_HISTORY_LOST)
+        return FakeChangeStream(precompute_service, [], None)
+
+    monkeypatch.setattr(precompute_service.precompute_repository, "watch_messages", watch_messages)
+
+    precompute_service.run_change_stream()
+
+    assert watched == [{"_data": "old"}, None]
+
+
+def test_falls_back_to_polling_without_change_streams(precompute_service, monkeypatch):
+    def unsupported():
+        raise OperationFailure("not a replica set", code=CHANGE_STREAM_NOT_SUPPORTED)
+
+    monkeypatch.setattr(precompute_service, "run_change_stream", unsupported)
+    monkeypatch.setattr(precompute_service, "run_polling", lambda: "polling")
+
+    assert precompute_service.run() == "polling"
+
+
+def test_other_change_stream_errors_are_raised(precompute_service, monkeypatch):
+    def failing():
+        raise OperationFailure("unauthorized", code=13)
+
+    monkeypatch.setattr(precompute_service, "run_change_stream", failing)
+
+    with pytest.raises(OperationFailure):
+        precompute_service.run()
+
+
+def test_polling_can_be_forced(precompute_service, monkeypatch):
+    def watching():
+        raise AssertionError("the change stream is not opened when polling")
+
+    monkeypatch.setattr(precompute_service, "run_change_stream", watching)
+    monkeypatch.setattr(precompute_service, "run_polling", lambda: "polling")
+
+    assert precompute_service.run(polling=True) == "polling"
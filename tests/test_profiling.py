@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from app.services import profiling
+from app.services.profiling import PROFILE_HEADER, RequestProfile, start_request_profile
+from app.services.sentiment_report_service import SentimentReportService
+from conftest import ACCOUNT_ID
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    directory = tmp_path / "profiles"
+    monkeypatch.setattr(profiling, "profile_token", "secret")
+    monkeypatch.setattr(profiling, "profile_sample_rate", 0.0)
+    monkeypatch.setattr(profiling, "profile_directory", str(directory))
+    yield directory
+    assert not profiling._profile_lock.locked()
+
+
+@pytest.mark.parametrize(
+    "token, requested",
+    [("secret", True), ("Secret", False), ("secret ", False), ("", False), (None, False)],
+)
+def test_token_check(profiles, token, requested):
+    assert profiling.profiling_requested(token) is requested
+
+
+def test_no_token_configured_never_matches(profiles, monkeypatch):
+    monkeypatch.setattr(profiling, "profile_token", "")
+
+    assert not profiling.profiling_requested("")
+
+
+@pytest.mark.parametrize(
+    "sample_rate, draw, requested", [(0.5, 0.3, True), (0.5, 0.7, False), (0.0, 0.0, False)]
+)
+def test_sample_rate(profiles, monkeypatch, sample_rate, draw, requested):
+    monkeypatch.setattr(profiling, "profile_sample_rate", sample_rate)
+    monkeypatch.setattr(profiling.random, "random", lambda: draw)
+
+    assert profiling.profiling_requested(None) is requested
+
+
+def test_profile_file_name_is_sanitized(profiles):
+    request_profile = start_request_profile("secret", "../../etc/chat 1@c.us")
+    request_profile.stop()
+
+    [name] = os.listdir(profiles)
+    assert name.startswith(".._.._etc_chat_1_c.us-") and name.endswith(".pstats")
+
+
+def test_missing_name(profiles):
+    assert RequestProfile(None).name == "unknown"
+
+
+def test_one_request_is_profiled_at_a_time(profiles):
+    request_profile = start_request_profile("secret", "w1")
+    assert start_request_profile("secret", "w2") is None
+
+    request_profile.stop()
+    start_request_profile("secret", "w3").stop()
+    assert len(os.listdir(profiles)) == 2
+
+
+def test_failed_dump_does_not_fail_the_request(profiles, tmp_path, monkeypatch):
+    # The directory can't be created below a regular file
+    (tmp_path / "file").write_text("")
+    monkeypatch.setattr(profiling, "profile_directory", str(tmp_path / "file" / "profiles"))
+
+    start_request_profile("secret", "w1").stop()
+
+
+def test_profile_of_a_request_that_raises(profiles, client, monkeypatch):
+    def failing(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(SentimentReportService, "get_report", failing)
+
+    response = client.get(
+        f"/report/?account_id={ACCOUNT_ID}&wa_chat_id=w1", headers={PROFILE_HEADER: "secret"}
+    )
+
+    assert response.status_code == 500
+    assert len(os.listdir(profiles)) == 1
@@ -0,0 +1,67 @@
+import pytest
+
+from bson.objectid import ObjectId
+
+
+@pytest.fixture
+def counts(report_service, monkeypatch):
+    # Arguments of every client message count sent to the database
+    calls = []
+    count_client_messages = report_service.report_repository.count_client_messages
+
+    def count(chat_id, after=None, after_id=None):
+        calls.append(after)
+        return count_client_messages(chat_id, after, after_id)
+
+    monkeypatch.setattr(report_service.report_repository, "count_client_messages", count)
+    return calls
+
+
+def test_client_count_without_state_counts_the_chat(report_service, chat_id, counts):
+    assert report_service.count_client_messages(chat_id, None) == 4
+    assert counts == [None]
+
+
+def test_client_count_reuses_the_chat_state(
+    report_service, db, make_message, chat_id, counts
+):
+    report_service.calculate_incremental_coef(chat_id)
+    db.messages.insert_many(
+        [make_message(chat_id, "que demora", minute=10), make_message(chat_id, "Já vai!", True, 11)]
+    )
+    state = report_service.report_repository.get_chat_state(chat_id)
+
+    assert report_service.count_client_messages(chat_id, state) == 5
+    # Only the messages after the state's checkpoint are counted
+    assert counts == [state["last_send_date"]]
+
+
+def test_recent_coef_counts_from_the_chat_state(report_service, db, chat_id, counts):
+    report_service.calculate_incremental_coef(chat_id)
+    state = report_service.report_repository.get_chat_state(chat_id)
+
+    result = report_service.calculate_recent_coef(chat_id, tolerance=0.5)
+    assert counts == [state["last_send_date"]]
+
+    db.chat_sentiment_states.delete_one({"_id": chat_id})
+    assert result == report_service.calculate_recent_coef(chat_id, tolerance=0.5)
+
+
+@pytest.mark.parametrize(
+    "fields, is_client",
+    [
+        ({"is_out": False}, True),
+        ({"is_out": None}, True),
+        ({"is_out": 0}, True),
+        ({}, True),
+        ({"is_out": True}, False),
+        ({"is_out": 1}, False),
+    ],
+)
+def test_client_filter_follows_is_out_truthiness(report_service, db, make_message, fields, is_client):
+    chat_id = ObjectId()
+    message = make_message(chat_id, "ok")
+    del message["is_out"]
+    db.messages.insert_one({**message, **fields})
+
+    assert report_service.report_repository.count_client_messages(chat_id) == int(is_client)
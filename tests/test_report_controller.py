@@ -0,0 +1,128 @@
+import pytest
+
+from bson.objectid import ObjectId
+from conftest import ACCOUNT_ID
+
+
+def report_url(**params):
+    return "/report/?" + "&".join(f"{key}={value}" for key, value in params.items())
+
+
+def test_report_is_revalidated_with_its_etag(client, chat_id):
+    response = client.get(report_url(account_id=ACCOUNT_ID, wa_chat_id="w1"))
+    assert response.status_code == 200
+    assert b"Satisfeito" in response.data
+
+    etag = response.headers["ETag"]
+    response = client.get(
+        report_url(account_id=ACCOUNT_ID, wa_chat_id="w1"), headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_recent_report_is_json(client, chat_id):
+    response = client.get(report_url(account_id=ACCOUNT_ID, wa_chat_id="w1", tolerance=0.5))
+
+    assert response.status_code == 200
+    assert set(response.get_json()) == {
+        "coefficient",
+        "error_bound",
+        "scored_messages",
+        "client_messages",
+        "label",
+    }
+
+
+@pytest.mark.parametrize(
+    "params, status_code",
+    [
+        ({"account_id": ACCOUNT_ID}, 400),
+        ({"account_id": ACCOUNT_ID, "wa_chat_id": "w1", "tolerance": "abc"}, 400),
+        ({"account_id": ACCOUNT_ID, "wa_chat_id": "w1", "tolerance": "0"}, 400),
+        ({"account_id": "not-an-id", "wa_chat_id": "w1"}, 400),
+        ({"account_id": ACCOUNT_ID, "wa_chat_id": "missing"}, 404),
+    ],
+)
+def test_report_errors(client, chat_id, params, status_code):
+    assert client.get(report_url(**params)).status_code == status_code
+
+
+def test_chat_without_enough_messages(client, db, make_message):
+    chat_id = db.chats.insert_one({"account": ObjectId(ACCOUNT_ID), "wa_chat_id": "w2"}).inserted_id
+    db.messages.insert_one(make_message(chat_id, "oi"))
+
+    assert client.get(report_url(account_id=ACCOUNT_ID, wa_chat_id="w2")).status_code == 404
+
+
+def test_batch_report_records_the_scored_chats(client, chat_id, db):
+    response = client.post(
+        "/report/batch",
+        json={
+            "chats": [
+                {"account_id": ACCOUNT_ID, "wa_chat_id": "w1"},
+                {"account_id": ACCOUNT_ID, "wa_chat_id": "missing"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[0]["chat_id"] == str(chat_id)
+    assert results[1]["error_type"] == "InexistantChat"
+    assert db.sentiment_snapshots.find_one()["cum_chat_count"] == 1
+
+
+def test_empty_batch_report(client):
+    response = client.post("/report/batch", json={"chats": []})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"results": []}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        None,
+        {},
+        {"chats": {"account_id": ACCOUNT_ID, "wa_chat_id": "w1"}},
+        {"chats": [{"account_id": ACCOUNT_ID}]},
+        {"chats": ["w1"]},
+    ],
+)
+def test_batch_report_bad_body(client, body):
+    if body is None:
+        response = client.post("/report/batch", data="not json")
+    else:
+        response = client.post("/report/batch", json=body)
+
+    assert response.status_code == 400
+
+
+def joint_sentiment_url(**params):
+    return "/report/joint_sentiment?" + "&".join(f"{k}={v}" for k, v in params.items())
+
+
+def test_joint_sentiment_of_reported_chats(client, chat_id):
+    report = client.get(report_url(account_id=ACCOUNT_ID, wa_chat_id="w1"))
+    assert report.status_code == 200
+
+    response = client.get(
+        joint_sentiment_url(account_id=ACCOUNT_ID, from_date="2000-01-01", to_date="2100-01-01")
+    )
+    assert response.status_code == 200
+    assert -2 <= float(response.data) <= 2
+
+
+@pytest.mark.parametrize(
+    "params, status_code",
+    [
+        ({"account_id": ACCOUNT_ID, "from_date": "2024-01-01"}, 400),
+        ({"account_id": ACCOUNT_ID, "from_date": "someday", "to_date": "2024-01-31"}, 400),
+        ({"account_id": ACCOUNT_ID, "from_date": "2024-01-01", "to_date": "2024-13-45"}, 400),
+        ({"account_id": "not-an-id", "from_date": "2024-01-01", "to_date": "2024-01-31"}, 400),
+        ({"account_id": ACCOUNT_ID, "from_date": "2024-01-01", "to_date": "2024-01-31"}, 404),
+    ],
+)
+def test_joint_sentiment_errors(client, params, status_code):
+    assert client.get(joint_sentiment_url(**params)).status_code == status_code
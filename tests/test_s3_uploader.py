@@ -0,0 +1,96 @@
+import io
+import os
+import threading
+
+import boto3
+import pytest
+
+from app.exceptions.errors import S3UploadError
+from app.services import report_renderer, s3_uploader
+from app.services.report_renderer import ReportRenderer
+from app.services.s3_uploader import MB, S3Uploader
+from moto import mock_aws
+
+BUCKET = "reports"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    # Every test starts without the process-wide client
+    monkeypatch.setattr(S3Uploader, "_client", None)
+    monkeypatch.setattr(S3Uploader, "_client_pid", None)
+
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def uploaded(s3, key: str):
+    return s3.get_object(Bucket=BUCKET, Key=key)
+
+
+def test_client_is_shared_by_threads(s3):
+    clients = []
+    threads = [
+        threading.Thread(target=lambda: clients.append(S3Uploader.get_client()))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(clients) == 4
+    assert all(client is clients[0] for client in clients)
+    assert S3Uploader().get_client() is clients[0]
+
+
+def test_forked_process_gets_its_own_client(s3):
+    client = S3Uploader.get_client()
+    S3Uploader._client_pid = os.getpid() + 1
+
+    assert S3Uploader.get_client() is not client
+
+
+def test_small_upload_is_a_single_put(s3):
+    S3Uploader().upload(io.BytesIO(b"%PDF-1.4 small"), BUCKET, "report/small.pdf")
+
+    obj = uploaded(s3, "report/small.pdf")
+    assert obj["Body"].read() == b"%PDF-1.4 small"
+    assert "-" not in obj["ETag"]
+
+
+def test_upload_above_threshold_is_multipart(s3, monkeypatch):
+    monkeypatch.setattr(s3_uploader, "multipart_threshold", 8 * MB)
+    monkeypatch.setattr(s3_uploader, "multipart_part_size", 5 * MB)
+    data = os.urandom(12 * MB)
+
+    S3Uploader().upload(io.BytesIO(data), BUCKET, "report/large.pdf")
+
+    obj = uploaded(s3, "report/large.pdf")
+    assert obj["Body"].read() == data
+    # Multipart ETags end with the number of parts
+    assert obj["ETag"].strip('"').endswith("-3")
+
+
+def test_large_report_spills_to_disk_and_uploads(s3, monkeypatch):
+    monkeypatch.setattr(report_renderer, "spool_max_size", 16 * 1024)
+    formated_chat = [f"[Cliente] (2024-01-01 09:{i % 60:02}) mensagem {i}" for i in range(500)]
+
+    with ReportRenderer().render(formated_chat, 0.5, "Levemente Satisfeito") as pdf_buffer:
+        assert pdf_buffer._rolled
+        expected = pdf_buffer.read()
+        pdf_buffer.seek(0)
+        S3Uploader().upload(pdf_buffer, BUCKET, "report/spilled.pdf")
+
+    assert uploaded(s3, "report/spilled.pdf")["Body"].read() == expected
+    assert expected.startswith(b"%PDF")
+
+
+def test_failed_upload_raises_s3_upload_error(s3, report_service):
+    with pytest.raises(S3UploadError):
+        report_service.update_file_to_s3(io.BytesIO(b"%PDF"), "missing-bucket", "report/x.pdf")
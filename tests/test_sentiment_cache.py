@@ -0,0 +1,69 @@
+import pytest
+
+from app.repositories.sentiment_cache_repository import SentimentCacheRepository
+from app.services.analyzer_registry import AnalyzerRegistry
+from app.services.report_service import ReportService
+from app.services.sentiment_cache import (
+    LRUCache,
+    SentimentCache,
+    get_sentiment_cache,
+    sentiment_cache,
+)
+
+
+@pytest.fixture
+def cache(mongo_client):
+    return SentimentCache(SentimentCacheRepository(mongo_client), max_size=10)
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUCache(max_size=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+
+    lru.put("c", 3)
+
+    assert len(lru) == 2
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+
+
+def test_stored_compounds_are_kept_in_memory(cache, db):
+    db.message_sentiments.insert_one({"_id": "stored", "compound": 0.5})
+
+    assert cache.get_many(["stored", "missing"]) == {"stored": 0.5}
+    assert cache.memory.get("stored") == 0.5
+
+    # Later lookups no longer need the persistent store
+    db.message_sentiments.delete_many({})
+    assert cache.get_many(["stored"]) == {"stored": 0.5}
+
+
+def test_existing_compounds_are_not_overwritten(cache, db):
+    cache.set_many({"a": 0.1})
+    cache.set_many({"a": 0.9, "b": 0.2})
+
+    stored = {entry["_id"]: entry["compound"] for entry in db.message_sentiments.find()}
+    assert stored == {"a": 0.1, "b": 0.2}
+
+
+def test_model_version_bump_misses_old_compounds(cache, monkeypatch):
+    cache.set_many({cache.make_key("m1", "adorei"): 0.8})
+
+    monkeypatch.setattr(AnalyzerRegistry, "model_version", "leia-vader-next")
+
+    assert cache.get_many([cache.make_key("m1", "adorei")]) == {}
+
+
+def test_service_client_is_used_for_the_compounds(mongo_client, db):
+    report_service = ReportService(mongo_client)
+    report_service.sentiment_cache.set_many({"m1:hash:v1": 0.5})
+
+    assert db.message_sentiments.find_one({"_id": "m1:hash:v1"})["compound"] == 0.5
+    # Services built with a client share the process LRU
+    assert report_service.sentiment_cache.memory is sentiment_cache.memory
+
+
+def test_default_cache_without_a_client():
+    assert get_sentiment_cache() is sentiment_cache
@@ -0,0 +1,102 @@
+import pytest
+
+from app.services.metrics import precomputed_reports
+from app.services.sentiment_report_service import SentimentReportService
+from conftest import ACCOUNT_ID
+
+
+@pytest.fixture
+def sentiment_report_service(mongo_client):
+    return SentimentReportService(mongo_client)
+
+
+@pytest.fixture
+def incremental_calls(sentiment_report_service, monkeypatch):
+    calls = []
+    report_service = sentiment_report_service.report_service
+    calculate_incremental_coef = report_service.calculate_incremental_coef
+
+    def counting(chat_id):
+        calls.append(chat_id)
+        return calculate_incremental_coef(chat_id)
+
+    monkeypatch.setattr(report_service, "calculate_incremental_coef", counting)
+    return calls
+
+
+def test_unchanged_chat_is_served_from_the_cache(
+    sentiment_report_service, chat_id, incremental_calls, db
+):
+    first = sentiment_report_service.get_report(ACCOUNT_ID, "w1")
+    second = sentiment_report_service.get_report(ACCOUNT_ID, "w1")
+
+    assert second == first
+    assert incremental_calls == [chat_id]
+    # The snapshot is only recorded once for the day
+    assert db.sentiment_snapshots.find_one()["cum_chat_count"] == 1
+
+
+def test_new_message_changes_the_version(
+    sentiment_report_service, chat_id, incremental_calls, db, make_message
+):
+    first = sentiment_report_service.get_report(ACCOUNT_ID, "w1")
+    db.messages.insert_one(make_message(chat_id, "péssimo, não resolveu", minute=30))
+    second = sentiment_report_service.get_report(ACCOUNT_ID, "w1")
+
+    assert second["version"] != first["version"]
+    assert second["coefficient"] < first["coefficient"]
+    assert incremental_calls == [chat_id, chat_id]
+
+
+def test_precomputed_coefficient_is_served_without_folding(
+    sentiment_report_service, chat_id, incremental_calls
+):
+    # The background worker folds the chat first
+    expected = sentiment_report_service.report_service.calculate_incremental_coef(chat_id)
+    incremental_calls.clear()
+    sentiment_report_service.precompute_enabled = True
+
+    report = sentiment_report_service.get_report(ACCOUNT_ID, "w1")
+
+    assert report["coefficient"] == expected
+    assert incremental_calls == []
+
+
+def test_stale_precomputed_coefficient_is_not_served(
+    sentiment_report_service, chat_id, incremental_calls, db, make_message
+):
+    stale = sentiment_report_service.report_service.calculate_incremental_coef(chat_id)
+    incremental_calls.clear()
+    sentiment_report_service.precompute_enabled = True
+    # A client message the worker has not folded yet
+    db.messages.insert_one(make_message(chat_id, "péssimo, não resolveu", minute=30))
+    stale_reports = precomputed_reports._values.get("stale", 0)
+
+    report = sentiment_report_service.get_report(ACCOUNT_ID, "w1")
+
+    assert report["coefficient"] < stale
+    assert incremental_calls == [chat_id]
+    assert precomputed_reports._values["stale"] == stale_reports + 1
+
+
+def test_attendant_message_keeps_the_precomputed_coefficient(
+    sentiment_report_service, chat_id, incremental_calls, db, make_message
+):
+    expected = sentiment_report_service.report_service.calculate_incremental_coef(chat_id)
+    incremental_calls.clear()
+    sentiment_report_service.precompute_enabled = True
+    db.messages.insert_one(make_message(chat_id, "Mais alguma dúvida?", is_out=True, minute=30))
+
+    report = sentiment_report_service.get_report(ACCOUNT_ID, "w1")
+
+    assert report["coefficient"] == expected
+    assert incremental_calls == []
+
+
+def test_recent_report_has_a_label(sentiment_report_service, chat_id):
+    result = sentiment_report_service.get_recent_report(ACCOUNT_ID, "w1", tolerance=0.5)
+
+    assert result["client_messages"] == 4
+    assert result["label"] == sentiment_report_service.report_service.generate_sentiment_label(
+        result["coefficient"]
+    )
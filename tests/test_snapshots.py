@@ -0,0 +1,66 @@
+import pytest
+
+from app.exceptions.errors import NoSentimentSnapshots
+from app.services.snapshot_service import SnapshotService
+from bson.objectid import ObjectId
+from conftest import ACCOUNT_ID
+from datetime import datetime as dt
+
+
+@pytest.fixture
+def snapshot_service(mongo_client):
+    return SnapshotService(mongo_client)
+
+
+def record(snapshot_service, coef: float, day: int, hour: int = 12, chat_id=None):
+    chat_id = chat_id or ObjectId()
+    snapshot_service.record_chat_sentiment(ACCOUNT_ID, chat_id, coef, dt(2024, 1, day, hour))
+    return chat_id
+
+
+def test_ranges_across_days(snapshot_service):
+    record(snapshot_service, 1.0, day=1)
+    record(snapshot_service, 0.5, day=2)
+    record(snapshot_service, -0.5, day=2)
+    record(snapshot_service, 2.0, day=4)
+
+    def joint(first_day: int, last_day: int):
+        return snapshot_service.get_joint_sentiment(
+            ACCOUNT_ID, dt(2024, 1, first_day, 8), dt(2024, 1, last_day, 20)
+        )
+
+    assert joint(1, 1) == pytest.approx(1.0)
+    assert joint(2, 2) == pytest.approx(0.0)
+    assert joint(1, 2) == pytest.approx(1.0 / 3)
+    # Days without snapshots inside the range change nothing
+    assert joint(2, 4) == pytest.approx(2.0 / 3)
+    assert joint(1, 31) == pytest.approx(3.0 / 4)
+
+
+def test_chat_reported_twice_on_a_day_counts_once(snapshot_service, db):
+    chat_id = record(snapshot_service, 1.0, day=1, hour=9)
+    record(snapshot_service, -1.0, day=1, hour=18, chat_id=chat_id)
+
+    snapshot = db.sentiment_snapshots.find_one()
+    assert (snapshot["chat_count"], snapshot["coef_sum"]) == (1, pytest.approx(-1.0))
+
+    # On a later day it counts again
+    record(snapshot_service, 0.5, day=2, chat_id=chat_id)
+    assert snapshot_service.get_joint_sentiment(
+        ACCOUNT_ID, dt(2024, 1, 1), dt(2024, 1, 2)
+    ) == pytest.approx(-0.25)
+
+
+def test_earlier_day_recorded_later_updates_cumulative_sums(snapshot_service, db):
+    record(snapshot_service, 1.0, day=3)
+    record(snapshot_service, 0.5, day=1)
+
+    last = db.sentiment_snapshots.find_one({"day": dt(2024, 1, 3)})
+    assert (last["cum_chat_count"], last["cum_coef_sum"]) == (2, pytest.approx(1.5))
+
+
+def test_empty_range_has_no_joint_sentiment(snapshot_service):
+    record(snapshot_service, 1.0, day=1)
+
+    with pytest.raises(NoSentimentSnapshots):
+        snapshot_service.get_joint_sentiment(ACCOUNT_ID, dt(2024, 1, 2), dt(2024, 1, 5))
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.exceptions.errors import NoClientMessages
+
+
+# Row by row implementation the vectorized kernel replaced
+def legacy_calculate_weight(order: int, n_messages: int):
+    if n_messages < 1:
+        raise NoClientMessages("Não há mensagens de clientes no chat")
+    den = 0
+    for i in range(1, n_messages + 1):
+        den += i**2
+    return (order**2) / den
+
+
+def legacy_generate_weighted_df(df: pd.DataFrame):
+    n_messages = df.shape[0]
+    return df.assign(
+        message_weight=df.apply(
+            lambda x: legacy_calculate_weight(x["order_in_chat"], n_messages), axis=1
+        )
+    )
+
+
+def legacy_calculate_chat_sentiment_coef(df: pd.DataFrame):
+    num = 0
+    den = 0
+    for idx, row in df.iterrows():
+        num += row["classification_label"] * row["message_weight"]
+        den += row["message_weight"]
+    return num / den
+
+
+def classified_df(n_messages: int, seed: int):
+    # Same columns as chat_classification output, orders shuffled to catch any
+    # dependence on row position
+    rng = np.random.default_rng(seed)
+    orders = rng.permutation(np.arange(1, n_messages + 1))
+    labels = rng.choice([-2, -1, 0, 1, 2], size=n_messages)
+    return pd.DataFrame(
+        {
+            "order_in_chat": pd.array(orders, dtype="Int32"),
+            "classification_score": rng.random(n_messages),
+            "classification_label": labels,
+        }
+    )
+
+
+@pytest.mark.parametrize("n_messages", [1, 2, 3, 17, 250, 3000])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_vectorized_weighting_matches_the_loops(report_service, n_messages, seed):
+    df = classified_df(n_messages, seed)
+
+    weighted_df = report_service.generate_weighted_df(df)
+    legacy_weighted_df = legacy_generate_weighted_df(df)
+    np.testing.assert_allclose(
+        weighted_df["message_weight"].to_numpy(dtype=np.float64),
+        legacy_weighted_df["message_weight"].to_numpy(dtype=np.float64),
+        rtol=1e-12,
+    )
+
+    coef = report_service.calculate_chat_sentiment_coef(weighted_df)
+    assert coef == pytest.approx(
+        legacy_calculate_chat_sentiment_coef(legacy_weighted_df), rel=1e-12, abs=1e-15
+    )
+    assert isinstance(coef, float)
+
+
+def test_single_message_gets_the_whole_weight(report_service):
+    df = classified_df(1, seed=0)
+    weighted_df = report_service.generate_weighted_df(df)
+
+    assert weighted_df["message_weight"].tolist() == [1.0]
+    assert report_service.calculate_chat_sentiment_coef(weighted_df) == float(
+        df["classification_label"].iloc[0]
+    )
+
+
+def test_chat_without_client_messages_has_no_coefficient(report_service):
+    df = classified_df(0, seed=0)
+
+    # The loops fail inside pandas, the kernel reports the missing client messages instead
+    with pytest.raises(ValueError):
+        legacy_calculate_chat_sentiment_coef(legacy_generate_weighted_df(df))
+    with pytest.raises(NoClientMessages):
+        report_service.generate_weighted_df(df)